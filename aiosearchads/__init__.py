@@ -1,15 +1,73 @@
 
-__all__ = ('AioSearchads')
+__all__ = ('AioSearchAds', 'SecretCache', 'SearchAdsError', 'ReportStream',
+           'RateLimiter', 'RetryPolicy', 'BulkResult', 'MultiOrg',
+           'ResponseCache', 'MemoryBackend', 'SqliteBackend', 'Mirror',
+           'ReportColumns', 'Money', 'Campaign', 'AdGroup', 'TargetingKeyword',
+           'NegativeKeyword', 'CreativeSet', 'AdGroupCreativeSet', 'WriteBuffer',
+           'BidOptimizer', 'MetricsSink', 'StatsSink', 'PrometheusSink',
+           'OpenTelemetrySink', 'Instrumentation', 'SyncSearchAds', 'StreamingReport',
+           'Transport', 'AiohttpTransport', 'HttpxTransport', 'MemoryTransport',
+           'Crawler', 'NdjsonOutput', 'ParquetOutput')
 
 
 import jwt
+import copy
+import time
+import asyncio
 import aiohttp
 import datetime
+import functools
+from .auth import SecretCache, default_secret_cache, load_private_key
+from .errors import SearchAdsError
+from .pagination import paginate, with_pagination
+from .reports import ReportStream, sharded_report, decode_report
+from .limiter import RateLimiter, retry_after
+from .retry import RetryPolicy, is_read_only
+from .bulk import BulkResult, run_bulk
+from .multi import MultiOrg
+from .cache import ResponseCache, MemoryBackend, SqliteBackend
+from .mirror import Mirror
+from .codec import get_codec
+from .columnar import ReportColumns
+from .models import (Money, Campaign, AdGroup, TargetingKeyword, NegativeKeyword,
+                     CreativeSet, AdGroupCreativeSet, with_models)
+from .singleflight import SingleFlight, request_key
+from .writebuffer import WriteBuffer
+from .bids import BidOptimizer
+from .metrics import (MetricsSink, StatsSink, PrometheusSink, OpenTelemetrySink,
+                      Instrumentation, get_instrumentation, url_family)
+from .sync import SyncSearchAds
+from .streaming import StreamingReport
+from .transport import Transport, AiohttpTransport, HttpxTransport, MemoryTransport
+from .crawler import Crawler, NdjsonOutput, ParquetOutput
 
 
 class AioSearchAds:
-    def __init__(self, org_id='', client_id='', team_id='',  key_id='', private_key='', version='v4', token=''):
+    def __init__(self, org_id='', client_id='', team_id='',  key_id='', private_key='', version='v4', token='',
+                 connector_limit=100, connector_limit_per_host=0, keepalive_timeout=30, ttl_dns_cache=300,
+                 token_refresh_margin=300, secret_cache=None, limiter=None,
+                 retry=None, cache=None, codec=None, coalesce=False, metrics=None,
+                 executor=None, offload_size=262144, transport=None,
+                 api_url='https://api.searchads.apple.com/api',
+                 token_url='https://appleid.apple.com/auth/oauth2/token'):
         '''init
+        connector_*, keepalive_timeout and ttl_dns_cache tune the pooled
+        session opened by `open()` or `async with AioSearchAds(...)`.
+        token_refresh_margin: seconds before expiry at which the token is renewed.
+        secret_cache: SecretCache for signed client secrets, shared in-process by default.
+        limiter: RateLimiter (or any object with the same run()) applied in call().
+        retry: RetryPolicy for read-only calls, applied around the limiter.
+        cache: ResponseCache for read-mostly GETs, invalidated by mutating calls.
+        codec: 'orjson', 'ujson', 'json' or a codec object; the fastest installed by default.
+        coalesce: identical read calls in flight at the same time share one request.
+        metrics: a MetricsSink (or list of sinks, or Instrumentation) receiving
+        per-request phase timings, sizes and statuses plus token refreshes.
+        executor: thread or process pool decoding reports/* bodies of at least
+        offload_size bytes, with any row transform/aggregate, off the event loop.
+        transport: Transport used once opened, e.g. HttpxTransport() for HTTP/2 or
+        MemoryTransport(handler) in tests; an AiohttpTransport built from
+        the connector_* settings by default.
+        api_url/token_url: endpoints, e.g. of aiosearchads.mock.MockSearchAds.
         '''
         self.org_id = org_id
         self.client_id = client_id
@@ -18,6 +76,81 @@ class AioSearchAds:
         self.private_key = private_key
         self.version = version
         self.token = token
+        self.token_expires_at = 0
+        self.token_refresh_margin = token_refresh_margin
+        self.secret_cache = secret_cache or default_secret_cache
+        self.limiter = limiter
+        self.retry = retry
+        self.cache = cache
+        self.codec = get_codec(codec)
+        self.singleflight = SingleFlight() if coalesce else None
+        self.metrics = get_instrumentation(metrics)
+        self.executor = executor
+        self.offload_size = offload_size
+        self.api_url = api_url
+        self.token_url = token_url
+        self.connector_limit = connector_limit
+        self.connector_limit_per_host = connector_limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+        self.transport = transport
+        self._transport = None
+        self._token_refresh = None
+        self._root = self
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def open(self):
+        '''Open the pooled transport shared by every request.
+        '''
+        root = self._root
+        if root._transport is None or root._transport.closed:
+            transport = root.transport
+            if transport is None:
+                trace_configs = None
+                if root.metrics is not None:
+                    trace_configs = [root.metrics.trace_config()]
+                transport = AiohttpTransport(
+                    limit=root.connector_limit,
+                    limit_per_host=root.connector_limit_per_host,
+                    keepalive_timeout=root.keepalive_timeout,
+                    ttl_dns_cache=root.ttl_dns_cache,
+                    trace_configs=trace_configs
+                )
+            await transport.open()
+            root._transport = transport
+        return root._transport
+
+    async def close(self):
+        '''Close the pooled transport, if any.
+        '''
+        root = self._root
+        if root._transport is not None:
+            await root._transport.close()
+            root._transport = None
+
+    def write_buffer(self, max_size=1000, max_delay=0.5, concurrency=4):
+        '''A WriteBuffer batching single keyword updates into bulk PUTs.
+        '''
+        return WriteBuffer(self, max_size, max_delay, concurrency)
+
+    def crawler(self, directory, output='ndjson', concurrency=8, checkpoint_interval=10):
+        '''A resumable Crawler dumping every entity of the org to `directory`.
+        '''
+        return Crawler(self, directory, output, concurrency, checkpoint_interval=checkpoint_interval)
+
+    def for_org(self, org_id):
+        '''A client for another org that shares this client's session,
+        access token, limiter and retry policy.
+        '''
+        client = copy.copy(self)
+        client.org_id = org_id
+        return client
 
     async def get_token(self):
         '''get token
@@ -26,13 +159,86 @@ class AioSearchAds:
 
     async def request(self, method, url, **kwargs):
         '''basic request
+        uses the pooled session when open, otherwise a one-off connection.
+        '''
+        _, _, data = await self._fetch(method, url, **kwargs)
+        return data
+
+    async def _fetch(self, method, url, rows=None, **kwargs):
+        '''Send a request and return (status, headers, data).
+        json bodies are encoded and responses decoded with self.codec.
+        rows: (transform, aggregate) to decode the body as a report page.
+        '''
+        body = kwargs.pop('json', None)
+        if body is not None:
+            kwargs['data'] = self.codec.dumps(body)
+            kwargs['headers'] = {'Content-Type': 'application/json', **(kwargs.get('headers') or {})}
+        if self.metrics is None:
+            return await self._round_trip(method, url, None, rows, kwargs)
+        family = url_family(url, self.api_url, self.token_url)
+        sample = self.metrics.start(family, method.upper(), kwargs.get('data'))
+        try:
+            response = await self._round_trip(method, url, sample, rows, kwargs)
+        except Exception as e:
+            self.metrics.finish(sample, error=e)
+            raise
+        self.metrics.finish(sample, response[0])
+        return response
+
+    async def _round_trip(self, method, url, sample, rows, kwargs):
+        transport = await self._pooled()
+        if transport is None:
+            async with aiohttp.request(method=method, url=url, **kwargs) as r:
+                return r.status, r.headers, await self._decode(r, sample, rows)
+        async with transport.request(method, url, trace=sample, **kwargs) as r:
+            return r.status, r.headers, await self._decode(r, sample, rows)
+
+    async def _pooled(self):
+        '''The open transport; a configured one is opened on first use, the
+        default aiohttp one only by open(), one-off connections otherwise.
+        '''
+        root = self._root
+        transport = root._transport
+        if transport is not None and not transport.closed:
+            return transport
+        if root.transport is not None:
+            return await self.open()
+        return None
+
+    async def _decode(self, r, sample=None, rows=None):
+        '''Decode a response body straight from its raw bytes.
+        Report pages go to the executor when they are large enough.
         '''
-        async with aiohttp.request(method=method, url=url, **kwargs) as r:
-            return await r.json(encoding='utf-8')
+        if sample is not None:
+            sample.headers()
+        raw = await r.read()
+        if sample is not None:
+            sample.lap('read')
+            sample.received = len(raw)
+        try:
+            if rows is None:
+                data = self.codec.loads(raw) if raw.strip() else None
+            elif self.executor is not None and len(raw) >= self.offload_size:
+                data = await asyncio.get_event_loop().run_in_executor(
+                    self.executor, decode_report, self.codec, raw, *rows)
+            else:
+                data = decode_report(self.codec, raw, *rows)
+        except ValueError:
+            raise aiohttp.ContentTypeError(
+                r.request_info, r.history, status=r.status,
+                message='Response body is not JSON', headers=r.headers)
+        if sample is not None:
+            sample.lap('decode')
+        return data
 
     def _get_client_secret(self):
         '''Get client_secret
+        reuses the cached secret until it gets close to expiry.
         '''
+        cache_key = (self.client_id, self.team_id, self.key_id)
+        client_secret = self.secret_cache.get(cache_key)
+        if client_secret:
+            return client_secret
         audience = 'https://appleid.apple.com'
         alg = 'ES256'
         issued_at_timestamp = int(datetime.datetime.utcnow().timestamp())
@@ -50,37 +256,210 @@ class AioSearchAds:
             payload=payload,
             headers=headers,
             algorithm=alg,
-            key=self.private_key
+            key=load_private_key(self.private_key)
         )
-        if isinstance(client_secret, str):
-            return client_secret
-        return client_secret.decode("utf-8")
+        if not isinstance(client_secret, str):
+            client_secret = client_secret.decode("utf-8")
+        self.secret_cache.set(cache_key, client_secret, expiration_timestamp)
+        return client_secret
 
     async def create_token(self):
         '''Create token
         '''
         client_secret = self._get_client_secret()
-        url = 'https://appleid.apple.com/auth/oauth2/token'
+        url = self.token_url
         headers = {'Host': 'appleid.apple.com',
                    'Content-Type': 'application/x-www-form-urlencoded'}
         params = {'client_id': self.client_id, 'client_secret': client_secret,
                   'grant_type': 'client_credentials', 'scope': 'searchadsorg'}
-        return await self.request('post', url, params=params, headers=headers)
+        started = time.perf_counter()
+        try:
+            data = await self.request('post', url, params=params, headers=headers)
+        except Exception:
+            if self.metrics is not None:
+                self.metrics.token_refresh(time.perf_counter() - started, False)
+            raise
+        ok = isinstance(data, dict) and bool(data.get('access_token'))
+        if ok:
+            self.token = data['access_token']
+            self.token_expires_at = time.time() + int(data.get('expires_in', 3600))
+        if self.metrics is not None:
+            self.metrics.token_refresh(time.perf_counter() - started, ok)
+        return data
 
-    async def call(self, method, resource, **kwargs):
-        '''basic call api method
+    def _can_refresh_token(self):
+        '''Whether the credentials needed to mint a token are present.
         '''
-        url = 'https://api.searchads.apple.com/api/%s/%s' % (
-            self.version, resource)
-        headers = {'Authorization': 'Bearer %s' % (
-            self.token)}
+        return bool(self.client_id and self.team_id and self.key_id and self.private_key)
+
+    def _token_expired(self):
+        '''Whether the token is missing or within the refresh margin of expiry.
+        '''
+        if not self.token:
+            return True
+        if not self.token_expires_at:
+            return False
+        return time.time() >= self.token_expires_at - self.token_refresh_margin
+
+    async def refresh_token(self, force=False, stale=None):
+        '''Refresh the access token when needed.
+        Concurrent callers share one in-flight request to appleid.apple.com.
+        stale: the token a caller saw rejected; skipped if already replaced.
+        '''
+        if stale is not None and self.token != stale:
+            return self.token
+        if not force and stale is None and not self._token_expired():
+            return self.token
+        if self._token_refresh is None:
+            self._token_refresh = asyncio.ensure_future(self.create_token())
+            self._token_refresh.add_done_callback(self._clear_token_refresh)
+        await asyncio.shield(self._token_refresh)
+        return self.token
+
+    def _clear_token_refresh(self, future):
+        self._token_refresh = None
+
+    def _call_headers(self, headers=None):
+        '''Authorization and org context headers for a call.
+        '''
+        base = {'Authorization': 'Bearer %s' % (
+            self._root.token)}
         if self.org_id:
-            headers['X-AP-Context'] = 'orgId=%s' % self.org_id
-        if 'headers' in kwargs:
-            kwargs['headers'] = {**headers, **kwargs['headers']}
-        else:
-            kwargs['headers'] = headers
-        return await self.request(method=method.upper(), url=url, **kwargs)
+            base['X-AP-Context'] = 'orgId=%s' % self.org_id
+        if headers:
+            return {**base, **headers}
+        return base
+
+    async def call(self, method, resource, transform=None, aggregate=None, **kwargs):
+        '''basic call api method
+        the access token is refreshed before expiry, and once more on a 401,
+        when client credentials are configured.
+        transform(row)/aggregate(rows): reshape the rows of a report page as it
+        is decoded; such calls bypass the cache and coalescing.
+        '''
+        url = '%s/%s/%s' % (
+            self.api_url, self.version, resource)
+        method = method.upper()
+        if transform is not None or aggregate is not None:
+            return await self._call(method, url, resource, None, rows=(transform, aggregate), **kwargs)
+        if self.executor is not None and resource.startswith('reports/'):
+            kwargs['rows'] = (None, None)
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.key(self.org_id, method, resource, kwargs)
+            if cache_key is not None:
+                data = await self.cache.get(cache_key)
+                if data is not None:
+                    return data
+        if self.singleflight is not None and is_read_only(method, resource):
+            key = request_key(self.org_id, method, resource, kwargs)
+            return await self.singleflight.run(key, functools.partial(
+                self._call, method, url, resource, cache_key, **kwargs))
+        return await self._call(method, url, resource, cache_key, **kwargs)
+
+    async def _call(self, method, url, resource, cache_key, **kwargs):
+        '''call() past the cache lookup.
+        '''
+        root = self._root
+        refreshable = root._can_refresh_token()
+        if refreshable:
+            await root.refresh_token()
+        headers = kwargs.pop('headers', None)
+        token = root.token
+        kwargs['headers'] = self._call_headers(headers)
+        status, _, data = await self._send(method, url, resource, **kwargs)
+        if status == 401 and refreshable:
+            await root.refresh_token(stale=token)
+            kwargs['headers'] = self._call_headers(headers)
+            status, _, data = await self._send(method, url, resource, **kwargs)
+        if self.cache is not None and status < 300:
+            if cache_key is not None:
+                await self.cache.set(cache_key, resource, data)
+            else:
+                await self.cache.invalidate(self.org_id, method, resource)
+        return data
+
+    async def stream(self, method, resource, chunk_size=65536, **kwargs):
+        '''Yield the body of an api call in chunks as they arrive from the socket.
+        The token is refreshed, and a 401 or (with a limiter) a 429 retried,
+        before anything is yielded; the retry policy and cache do not apply.
+        With metrics each round trip is recorded like any other call.
+        '''
+        url = '%s/%s/%s' % (self.api_url, self.version, resource)
+        method = method.upper()
+        root = self._root
+        refreshable = root._can_refresh_token()
+        if refreshable:
+            await root.refresh_token()
+        headers = kwargs.pop('headers', None)
+        body = kwargs.pop('json', None)
+        if body is not None:
+            kwargs['data'] = self.codec.dumps(body)
+            headers = {'Content-Type': 'application/json', **(headers or {})}
+        transport = await self._pooled()
+        own = transport is None
+        if own:
+            transport = AiohttpTransport(limit=1)
+            await transport.open()
+        family = url_family(url, self.api_url, self.token_url)
+        try:
+            throttled = 0
+            while True:
+                if self.limiter is not None:
+                    await self.limiter.bucket(self.org_id, resource).acquire()
+                token = root.token
+                sample = None if self.metrics is None else self.metrics.start(family, method, kwargs.get('data'))
+                status = None
+                try:
+                    async with transport.request(method, url, headers=self._call_headers(headers),
+                                                 trace=sample, **kwargs) as r:
+                        status = r.status
+                        if sample is not None:
+                            sample.headers()
+                        if r.status == 401 and refreshable:
+                            refreshable = False
+                            await r.read()
+                            await root.refresh_token(stale=token)
+                            continue
+                        if r.status == 429 and self.limiter is not None and throttled < self.limiter.max_retries:
+                            throttled += 1
+                            self.limiter.bucket(self.org_id, resource).block(retry_after(r.headers))
+                            await r.read()
+                            continue
+                        async for chunk in r.iter_chunked(chunk_size):
+                            if sample is not None:
+                                sample.received += len(chunk)
+                            yield chunk
+                        if sample is not None:
+                            sample.lap('read')
+                        return
+                except Exception as e:
+                    if sample is not None:
+                        self.metrics.finish(sample, error=e)
+                        sample = None
+                    raise
+                finally:
+                    # also when the consumer stops early: the sample then has no read phase
+                    if sample is not None:
+                        self.metrics.finish(sample, status)
+        finally:
+            if own:
+                await transport.close()
+
+    def stream_report(self, resource, data, chunk_size=65536, transform=None):
+        '''Rows of a reports/* resource parsed while they download; see StreamingReport.
+        '''
+        return StreamingReport(self, resource, data, chunk_size, transform)
+
+    async def _send(self, method, url, resource, **kwargs):
+        '''One api round trip, through the retry policy and limiter when configured.
+        '''
+        send = functools.partial(self._fetch, method=method, url=url, **kwargs)
+        if self.limiter is not None:
+            send = functools.partial(self.limiter.run, self.org_id, resource, send)
+        if self.retry is None:
+            return await send()
+        return await self.retry.run(method, resource, send)
 
     async def acls(self):
         '''Fetches roles and organizations that the API has access to.
@@ -107,7 +486,7 @@ class AioSearchAds:
         }
         return await self.call('post', resource, json={**data, **kwargs})
 
-    async def find_campaigns(self, offset, limit, order_by=[], conditions=[]):
+    async def find_campaigns(self, offset, limit, order_by=[], conditions=[], model=False):
         '''Fetches campaigns with selector operators.
         docs: https://developer.apple.com/documentation/apple_search_ads/find_campaigns?changes=latest_major
         params:{
@@ -131,11 +510,20 @@ class AioSearchAds:
                 }
             ]
         }
+        model: return Campaign instances instead of dicts.
         '''
         resource = 'campaigns/find'
         data = {'pagination': {'offset': offset, 'limit': limit},
                 'orderBy': order_by, 'conditions': conditions}
-        return await self.call('post', resource, json=data)
+        response = await self.call('post', resource, json=data)
+        return with_models(response, Campaign) if model else response
+
+    def iter_find_campaigns(self, order_by=[], conditions=[], limit=1000, window=4, model=False):
+        '''Iterates campaigns matching a selector, fetching `window` pages at a time.
+        '''
+        def fetch(offset, limit):
+            return self.find_campaigns(offset, limit, order_by, conditions, model=model)
+        return paginate(fetch, limit, window)
 
     async def get_campaign(self, campaign_id):
         '''Fetches a specific campaign by campaign identifier.
@@ -144,13 +532,20 @@ class AioSearchAds:
         resource = 'campaigns/%s' % campaign_id
         return await self.call('get', resource)
 
-    async def all_campaigns(self, offset, limit):
+    async def all_campaigns(self, offset, limit, model=False):
         '''Fetches all of an organization’s assigned campaigns.
         docs:https://developer.apple.com/documentation/apple_search_ads/get_all_campaigns?changes=latest_major
+        model: return Campaign instances instead of dicts.
         '''
         resource = 'campaigns'
         params = {'offset': offset, 'limit': limit}
-        return await self.call('get', resource, params=params)
+        response = await self.call('get', resource, params=params)
+        return with_models(response, Campaign) if model else response
+
+    def iter_campaigns(self, limit=1000, window=4, model=False):
+        '''Iterates all campaigns, fetching `window` pages at a time.
+        '''
+        return paginate(functools.partial(self.all_campaigns, model=model), limit, window)
 
     async def update_campaigns(self, campaign_id, campaign, clear=True):
         '''Updates a campaign with a campaign identifier.
@@ -181,14 +576,23 @@ class AioSearchAds:
         }
         return await self.call('post', resource, json={**data, **kwargs})
 
-    async def find_adgroups(self, campaign_id, offset, limit, order_by, conditions):
+    async def find_adgroups(self, campaign_id, offset, limit, order_by, conditions, model=False):
         '''Fetches ad groups within a campaign.
         docs:https://developer.apple.com/documentation/apple_search_ads/find_ad_groups?changes=latest_major
+        model: return AdGroup instances instead of dicts.
         '''
         resource = 'campaigns/%s/adgroups/find' % campaign_id
         data = {'pagination': {'offset': offset, 'limit': limit},
                 'orderBy': order_by, 'conditions': conditions}
-        return await self.call('post', resource, json=data)
+        response = await self.call('post', resource, json=data)
+        return with_models(response, AdGroup) if model else response
+
+    def iter_find_adgroups(self, campaign_id, order_by=[], conditions=[], limit=1000, window=4, model=False):
+        '''Iterates ad groups matching a selector, fetching `window` pages at a time.
+        '''
+        def fetch(offset, limit):
+            return self.find_adgroups(campaign_id, offset, limit, order_by, conditions, model=model)
+        return paginate(fetch, limit, window)
 
     async def get_adgroup(self, campaign_id, adgroup_id):
         '''Fetches a specific ad group with a campaign and ad group identifier.
@@ -197,13 +601,20 @@ class AioSearchAds:
         resource = 'campaigns/%s/adgroups/%s' % (campaign_id, adgroup_id)
         return await self.call('get', resource)
 
-    async def all_adgroups(self, campaign_id, offset, limit):
+    async def all_adgroups(self, campaign_id, offset, limit, model=False):
         '''Fetches all ad groups with a campaign identifier.
         docs:https://developer.apple.com/documentation/apple_search_ads/get_all_ad_groups?changes=latest_major
+        model: return AdGroup instances instead of dicts.
         '''
         resource = 'campaigns/%s/adgroups' % (campaign_id)
         params = {'offset': offset, 'limit': limit}
-        return await self.call('get', resource, params=params)
+        response = await self.call('get', resource, params=params)
+        return with_models(response, AdGroup) if model else response
+
+    def iter_adgroups(self, campaign_id, limit=1000, window=4, model=False):
+        '''Iterates all ad groups of a campaign, fetching `window` pages at a time.
+        '''
+        return paginate(functools.partial(self.all_adgroups, campaign_id, model=model), limit, window)
 
     async def update_adgroup(self, campaign_id, adgroup_id, name, cpa, start_time, end_time, auto, model, amount, dimensions):
         '''Updates an ad group with an ad group identifier.
@@ -266,15 +677,30 @@ class AioSearchAds:
             campaign_id, adgroup_id)
         return await self.call('post', resource, json=words)
 
-    async def find_targeting_keywords(self, campaign_id, offset, limit, order_by, conditions):
+    async def bulk_create_targeting_keywords(self, campaign_id, adgroup_id, words, chunk_size=1000, concurrency=4):
+        '''create_targeting_keywords in API-sized chunks sent concurrently; returns a BulkResult.
+        '''
+        send = functools.partial(self.create_targeting_keywords, campaign_id, adgroup_id)
+        return await run_bulk(send, words, chunk_size, concurrency)
+
+    async def find_targeting_keywords(self, campaign_id, offset, limit, order_by, conditions, model=False):
         '''Fetches targeting keywords in a campaign’s ad groups.
         docs:https://developer.apple.com/documentation/apple_search_ads/find_targeting_keywords_in_a_campaign?changes=latest_major
+        model: return TargetingKeyword instances instead of dicts.
         '''
         resource = 'campaigns/%s/adgroups/targetingkeywords/find' % (
             campaign_id)
         data = {'pagination': {'offset': offset, 'limit': limit},
                 'orderBy': order_by, 'conditions': conditions}
-        return await self.call('post', resource, json=data)
+        response = await self.call('post', resource, json=data)
+        return with_models(response, TargetingKeyword) if model else response
+
+    def iter_find_targeting_keywords(self, campaign_id, order_by=[], conditions=[], limit=1000, window=4, model=False):
+        '''Iterates targeting keywords matching a selector, fetching `window` pages at a time.
+        '''
+        def fetch(offset, limit):
+            return self.find_targeting_keywords(campaign_id, offset, limit, order_by, conditions, model=model)
+        return paginate(fetch, limit, window)
 
     async def get_targeting_keyword(self, campaign_id, adgroup_id, keyword_id):
         '''Fetches a specific targeting keyword in an ad group.
@@ -284,14 +710,21 @@ class AioSearchAds:
             campaign_id, adgroup_id, keyword_id)
         return await self.call('get', resource)
 
-    async def all_targeting_keywords(self, campaign_id, adgroup_id, offset, limit):
+    async def all_targeting_keywords(self, campaign_id, adgroup_id, offset, limit, model=False):
         '''Fetches all targeting keywords in ad groups.
         docs:https://developer.apple.com/documentation/apple_search_ads/get_all_targeting_keywords_in_an_ad_group?changes=latest_major
+        model: return TargetingKeyword instances instead of dicts.
         '''
         resource = 'campaigns/%s/adgroups/%s/targetingkeywords' % (
             campaign_id, adgroup_id)
         params = {'offset': offset, 'limit': limit}
-        return await self.call('get', resource, params=params)
+        response = await self.call('get', resource, params=params)
+        return with_models(response, TargetingKeyword) if model else response
+
+    def iter_targeting_keywords(self, campaign_id, adgroup_id, limit=1000, window=4, model=False):
+        '''Iterates all targeting keywords of an ad group, fetching `window` pages at a time.
+        '''
+        return paginate(functools.partial(self.all_targeting_keywords, campaign_id, adgroup_id, model=model), limit, window)
 
     async def update_targeting_keywords(self, campaign_id, adgroup_id, keywords):
         '''Updates targeting keywords in ad groups.
@@ -309,6 +742,12 @@ class AioSearchAds:
             campaign_id, adgroup_id)
         return await self.call('put', resource, json=keywords)
 
+    async def bulk_update_targeting_keywords(self, campaign_id, adgroup_id, keywords, chunk_size=1000, concurrency=4):
+        '''update_targeting_keywords in API-sized chunks sent concurrently; returns a BulkResult.
+        '''
+        send = functools.partial(self.update_targeting_keywords, campaign_id, adgroup_id)
+        return await run_bulk(send, keywords, chunk_size, concurrency)
+
     async def create_negative_keywords(self, campaign_id, keywords):
         '''Creates negative keywords for a campaign.
         docs:https://developer.apple.com/documentation/apple_search_ads/create_campaign_negative_keywords?changes=latest_major
@@ -320,14 +759,29 @@ class AioSearchAds:
         resource = 'campaigns/%s/negativekeywords/bulk' % (campaign_id)
         return await self.call('post', resource, json=keywords)
 
-    async def find_negative_keywords(self, campaign_id, offset, limit, order_by, conditions):
+    async def bulk_create_negative_keywords(self, campaign_id, keywords, chunk_size=1000, concurrency=4):
+        '''create_negative_keywords in API-sized chunks sent concurrently; returns a BulkResult.
+        '''
+        send = functools.partial(self.create_negative_keywords, campaign_id)
+        return await run_bulk(send, keywords, chunk_size, concurrency)
+
+    async def find_negative_keywords(self, campaign_id, offset, limit, order_by, conditions, model=False):
         '''Fetches negative keywords for campaigns.
         docs:https://developer.apple.com/documentation/apple_search_ads/find_campaign_negative_keywords?changes=latest_major
+        model: return NegativeKeyword instances instead of dicts.
         '''
         resource = 'campaigns/%s/negativekeywords/find' % campaign_id
         data = {'pagination': {'offset': offset, 'limit': limit},
                 'orderBy': order_by, 'conditions': conditions}
-        return await self.call('post', resource, json=data)
+        response = await self.call('post', resource, json=data)
+        return with_models(response, NegativeKeyword) if model else response
+
+    def iter_find_negative_keywords(self, campaign_id, order_by=[], conditions=[], limit=1000, window=4, model=False):
+        '''Iterates campaign negative keywords matching a selector, fetching `window` pages at a time.
+        '''
+        def fetch(offset, limit):
+            return self.find_negative_keywords(campaign_id, offset, limit, order_by, conditions, model=model)
+        return paginate(fetch, limit, window)
 
     async def get_negative_keyword(self, campaign_id, keyword_id):
         '''Fetches a specific negative keyword in a campaign.
@@ -337,13 +791,20 @@ class AioSearchAds:
             campaign_id, keyword_id)
         return await self.call('post', resource)
 
-    async def all_negative_keywords(self, campaign_id, offset, limit):
+    async def all_negative_keywords(self, campaign_id, offset, limit, model=False):
         '''Fetches all negative keywords in a campaign.
         docs:https://developer.apple.com/documentation/apple_search_ads/get_all_campaign_negative_keywords?changes=latest_major
+        model: return NegativeKeyword instances instead of dicts.
         '''
         resource = 'campaigns/%s/negativekeywords' % campaign_id
         params = {'offset': offset, 'limit': limit}
-        return await self.call('get', resource, params=params)
+        response = await self.call('get', resource, params=params)
+        return with_models(response, NegativeKeyword) if model else response
+
+    def iter_negative_keywords(self, campaign_id, limit=1000, window=4, model=False):
+        '''Iterates all negative keywords of a campaign, fetching `window` pages at a time.
+        '''
+        return paginate(functools.partial(self.all_negative_keywords, campaign_id, model=model), limit, window)
 
     async def update_negative_keywords(self, campaign_id, keywords):
         '''Updates negative keywords in a campaign.
@@ -352,6 +813,12 @@ class AioSearchAds:
         resource = 'campaigns/%s/negativekeywords/bulk' % (campaign_id)
         return await self.call('put', resource, json=keywords)
 
+    async def bulk_update_negative_keywords(self, campaign_id, keywords, chunk_size=1000, concurrency=4):
+        '''update_negative_keywords in API-sized chunks sent concurrently; returns a BulkResult.
+        '''
+        send = functools.partial(self.update_negative_keywords, campaign_id)
+        return await run_bulk(send, keywords, chunk_size, concurrency)
+
     async def delete_negative_keywords(self, campaign_id, keyword_ids):
         '''Deletes negative keywords from a campaign.
         docs:https://developer.apple.com/documentation/apple_search_ads/delete_campaign_negative_keywords?changes=latest_major
@@ -364,6 +831,12 @@ class AioSearchAds:
         resource = 'campaigns/%s/negativekeywords/delete/bulk' % (campaign_id)
         return await self.call('post', resource, json=keyword_ids)
 
+    async def bulk_delete_negative_keywords(self, campaign_id, keyword_ids, chunk_size=1000, concurrency=4):
+        '''delete_negative_keywords in API-sized chunks sent concurrently; returns a BulkResult.
+        '''
+        send = functools.partial(self.delete_negative_keywords, campaign_id)
+        return await run_bulk(send, keyword_ids, chunk_size, concurrency)
+
     async def create_adgroup_negative_keywords(self, campaign_id, adgroup_id, keywords):
         '''Creates negative keywords in a specific ad group.
         docs:https://developer.apple.com/documentation/apple_search_ads/create_ad_group_negative_keywords?changes=latest_major
@@ -376,14 +849,29 @@ class AioSearchAds:
             campaign_id, adgroup_id)
         return await self.call('post', resource, json=keywords)
 
-    async def find_adgroup_negative_keywords(self, campaign_id, offset, limit, order_by, conditions):
+    async def bulk_create_adgroup_negative_keywords(self, campaign_id, adgroup_id, keywords, chunk_size=1000, concurrency=4):
+        '''create_adgroup_negative_keywords in API-sized chunks sent concurrently; returns a BulkResult.
+        '''
+        send = functools.partial(self.create_adgroup_negative_keywords, campaign_id, adgroup_id)
+        return await run_bulk(send, keywords, chunk_size, concurrency)
+
+    async def find_adgroup_negative_keywords(self, campaign_id, offset, limit, order_by, conditions, model=False):
         '''Fetches negative keywords in a campaign’s ad groups.
         docs:https://developer.apple.com/documentation/apple_search_ads/find_ad_group_negative_keywords?changes=latest_major
+        model: return NegativeKeyword instances instead of dicts.
         '''
         resource = 'campaigns/%s/adgroups/negativekeywords/find' % campaign_id
         data = {'pagination': {'offset': offset, 'limit': limit},
                 'orderBy': order_by, 'conditions': conditions}
-        return await self.call('post', resource, json=data)
+        response = await self.call('post', resource, json=data)
+        return with_models(response, NegativeKeyword) if model else response
+
+    def iter_find_adgroup_negative_keywords(self, campaign_id, order_by=[], conditions=[], limit=1000, window=4, model=False):
+        '''Iterates ad group negative keywords matching a selector, fetching `window` pages at a time.
+        '''
+        def fetch(offset, limit):
+            return self.find_adgroup_negative_keywords(campaign_id, offset, limit, order_by, conditions, model=model)
+        return paginate(fetch, limit, window)
 
     async def get_adgroup_negative_keyword(self, campaign_id, adgroup_id, keyword_id):
         '''Fetches a specific negative keyword in an ad group.
@@ -393,14 +881,21 @@ class AioSearchAds:
             campaign_id, adgroup_id, keyword_id)
         return await self.call('get', resource)
 
-    async def all_adgroup_negative_keywords(self, campaign_id, adgroup_id, offset, limit):
+    async def all_adgroup_negative_keywords(self, campaign_id, adgroup_id, offset, limit, model=False):
         '''Fetches all negative keywords in ad groups.
         docs:https://developer.apple.com/documentation/apple_search_ads/get_all_ad_group_negative_keywords?changes=latest_major
+        model: return NegativeKeyword instances instead of dicts.
         '''
         resource = 'campaigns/%s/adgroups/%s/negativekeywords' % (
             campaign_id, adgroup_id)
         params = {'offset': offset, 'limit': limit}
-        return await self.call('get', resource, params=params)
+        response = await self.call('get', resource, params=params)
+        return with_models(response, NegativeKeyword) if model else response
+
+    def iter_adgroup_negative_keywords(self, campaign_id, adgroup_id, limit=1000, window=4, model=False):
+        '''Iterates all negative keywords of an ad group, fetching `window` pages at a time.
+        '''
+        return paginate(functools.partial(self.all_adgroup_negative_keywords, campaign_id, adgroup_id, model=model), limit, window)
 
     async def update_adgroup_negative_keywords(self, campaign_id, adgroup_id, keywords):
         '''Updates negative keywords in an ad group.
@@ -410,6 +905,12 @@ class AioSearchAds:
             campaign_id, adgroup_id)
         return await self.call('put', resource, json=keywords)
 
+    async def bulk_update_adgroup_negative_keywords(self, campaign_id, adgroup_id, keywords, chunk_size=1000, concurrency=4):
+        '''update_adgroup_negative_keywords in API-sized chunks sent concurrently; returns a BulkResult.
+        '''
+        send = functools.partial(self.update_adgroup_negative_keywords, campaign_id, adgroup_id)
+        return await run_bulk(send, keywords, chunk_size, concurrency)
+
     async def delete_adgroup_negative_keywords(self, campaign_id, adgroup_id, keyword_ids):
         '''Deletes negative keywords from an ad group.
         docs:https://developer.apple.com/documentation/apple_search_ads/delete_ad_group_negative_keywords?changes=latest_major
@@ -418,6 +919,12 @@ class AioSearchAds:
             campaign_id, adgroup_id)
         return await self.call('post', resource, json=keyword_ids)
 
+    async def bulk_delete_adgroup_negative_keywords(self, campaign_id, adgroup_id, keyword_ids, chunk_size=1000, concurrency=4):
+        '''delete_adgroup_negative_keywords in API-sized chunks sent concurrently; returns a BulkResult.
+        '''
+        send = functools.partial(self.delete_adgroup_negative_keywords, campaign_id, adgroup_id)
+        return await run_bulk(send, keyword_ids, chunk_size, concurrency)
+
     async def search_geolocations(self, country_code, entity, query, offset, limit):
         '''Fetches a list of geolocations for audience refinement.
         docs:https://developer.apple.com/documentation/apple_search_ads/search_for_geolocations?changes=latest_major
@@ -475,12 +982,21 @@ class AioSearchAds:
             campaign_id, adgroup_id)
         return await self.call('post', resource, json=data)
 
-    async def find_adgroup_creativesets(self, campaign_id, data):
+    async def find_adgroup_creativesets(self, campaign_id, data, model=False):
         '''Fetches all assigned Creative Sets for ad groups.
         docs:https://developer.apple.com/documentation/apple_search_ads/find_ad_group_creative_sets
+        model: return AdGroupCreativeSet instances instead of dicts.
         '''
         resource = 'campaigns/%s/adgroupcreativesets/find' % campaign_id
-        return await self.call('post', resource, json=data)
+        response = await self.call('post', resource, json=data)
+        return with_models(response, AdGroupCreativeSet) if model else response
+
+    def iter_find_adgroup_creativesets(self, campaign_id, data={}, limit=1000, window=4, model=False):
+        '''Iterates ad group Creative Sets matching a selector, fetching `window` pages at a time.
+        '''
+        def fetch(offset, limit):
+            return self.find_adgroup_creativesets(campaign_id, with_pagination(data, offset, limit), model=model)
+        return paginate(fetch, limit, window)
 
     async def update_adgroup_creativesets(self, campaign_id, adgroup_id, adgroup_creativeset_id, data):
         '''Updates an ad group Creative Set using an identifier.
@@ -499,6 +1015,12 @@ class AioSearchAds:
             campaign_id, adgroup_id)
         return await self.call('post', resource, json=adgroup_creativeset_ids)
 
+    async def bulk_delete_adgroup_creativesets(self, campaign_id, adgroup_id, adgroup_creativeset_ids, chunk_size=1000, concurrency=4):
+        '''delete_adgroup_creativesets in API-sized chunks sent concurrently; returns a BulkResult.
+        '''
+        send = functools.partial(self.delete_adgroup_creativesets, campaign_id, adgroup_id)
+        return await run_bulk(send, adgroup_creativeset_ids, chunk_size, concurrency)
+
     async def get_creativeset_ad_variation(self, creativeset_id, include_deleted_creativeset_assets='true'):
         '''Fetches asset details of a Creative Set ad variation.
         docs:https://developer.apple.com/documentation/apple_search_ads/get_a_creative_set_ad_variation
@@ -508,12 +1030,21 @@ class AioSearchAds:
             'includeDeletedCreativeSetAssets': include_deleted_creativeset_assets}
         return await self.call('get', resource, params=params)
 
-    async def find_creativesets(self, data):
+    async def find_creativesets(self, data, model=False):
         '''Fetches all assigned Creative Sets for an organization.
         docs:https://developer.apple.com/documentation/apple_search_ads/find_creative_sets
+        model: return CreativeSet instances instead of dicts.
         '''
         resource = 'creativesets/find'
-        return await self.call('post', resource, json=data)
+        response = await self.call('post', resource, json=data)
+        return with_models(response, CreativeSet) if model else response
+
+    def iter_find_creativesets(self, data={}, limit=1000, window=4, model=False):
+        '''Iterates Creative Sets matching a selector, fetching `window` pages at a time.
+        '''
+        def fetch(offset, limit):
+            return self.find_creativesets(with_pagination(data, offset, limit), model=model)
+        return paginate(fetch, limit, window)
 
     async def assign_creativesets_to_adgroup(self, campaign_id, adgroup_id, data):
         '''Creates a Creative Set assignment to an ad group.
@@ -530,7 +1061,7 @@ class AioSearchAds:
         resource = 'creativesets/%s' % creativeset_id
         return await self.call('put', resource, json=data)
 
-    async def get_campaign_level_reports(self, data):
+    async def get_campaign_level_reports(self, data, transform=None, aggregate=None):
         '''Fetches reports for campaigns.
         docs:https://developer.apple.com/documentation/apple_search_ads/get_campaign-level_reports?changes=latest_major
         data:{
@@ -575,9 +1106,25 @@ class AioSearchAds:
             }
         '''
         resource = 'reports/campaigns'
-        return await self.call('post', resource, json=data)
+        return await self.call('post', resource, transform, aggregate, json=data)
+
+    def iter_campaign_level_reports(self, data, prefetch=True, transform=None, stream=False):
+        '''Streams every campaign report row across pages; see ReportStream.
+        stream: parse each page incrementally as it arrives; see StreamingReport.
+        Streamed pages are fetched one after the other, so prefetch does not apply.
+        '''
+        if stream:
+            return self.stream_report('reports/campaigns', data, transform=transform)
+        return ReportStream(functools.partial(self.get_campaign_level_reports, transform=transform),
+                            data, prefetch)
 
-    async def get_adgroup_level_reports(self, campaign_id, data):
+    async def get_campaign_level_reports_sharded(self, data, shard='WEEK', concurrency=4):
+        '''Fetches a campaign report as concurrent date-range shards merged into one response.
+        shard: 'DAY', 'WEEK', 'MONTH' or a number of days.
+        '''
+        return await sharded_report(self.get_campaign_level_reports, data, shard, concurrency)
+
+    async def get_adgroup_level_reports(self, campaign_id, data, transform=None, aggregate=None):
         '''Fetches reports for targeting keywords within a campaign.
         docs:https://developer.apple.com/documentation/apple_search_ads/get_keyword-level_reports
         data:{
@@ -613,9 +1160,25 @@ class AioSearchAds:
             }
         '''
         resource = 'reports/campaigns/%s/adgroups' % campaign_id
-        return await self.call('post', resource, json=data)
+        return await self.call('post', resource, transform, aggregate, json=data)
+
+    def iter_adgroup_level_reports(self, campaign_id, data, prefetch=True, transform=None, stream=False):
+        '''Streams every ad group report row across pages; see ReportStream.
+        stream: parse each page incrementally as it arrives; see StreamingReport.
+        Streamed pages are fetched one after the other, so prefetch does not apply.
+        '''
+        if stream:
+            return self.stream_report('reports/campaigns/%s/adgroups' % campaign_id, data, transform=transform)
+        return ReportStream(functools.partial(self.get_adgroup_level_reports, campaign_id, transform=transform),
+                            data, prefetch)
 
-    async def get_keyword_level_reports(self, campaign_id, data):
+    async def get_adgroup_level_reports_sharded(self, campaign_id, data, shard='WEEK', concurrency=4):
+        '''Fetches a ad group report as concurrent date-range shards merged into one response.
+        shard: 'DAY', 'WEEK', 'MONTH' or a number of days.
+        '''
+        return await sharded_report(functools.partial(self.get_adgroup_level_reports, campaign_id), data, shard, concurrency)
+
+    async def get_keyword_level_reports(self, campaign_id, data, transform=None, aggregate=None):
         '''Fetches reports for targeting keywords within a campaign.
         docs:https://developer.apple.com/documentation/apple_search_ads/get_keyword-level_reports
         data:{
@@ -651,9 +1214,25 @@ class AioSearchAds:
             }
         '''
         resource = 'reports/campaigns/%s/keywords' % campaign_id
-        return await self.call('post', resource, json=data)
+        return await self.call('post', resource, transform, aggregate, json=data)
 
-    async def get_search_term_level_reports(self, campaign_id, data):
+    def iter_keyword_level_reports(self, campaign_id, data, prefetch=True, transform=None, stream=False):
+        '''Streams every keyword report row across pages; see ReportStream.
+        stream: parse each page incrementally as it arrives; see StreamingReport.
+        Streamed pages are fetched one after the other, so prefetch does not apply.
+        '''
+        if stream:
+            return self.stream_report('reports/campaigns/%s/keywords' % campaign_id, data, transform=transform)
+        return ReportStream(functools.partial(self.get_keyword_level_reports, campaign_id, transform=transform),
+                            data, prefetch)
+
+    async def get_keyword_level_reports_sharded(self, campaign_id, data, shard='WEEK', concurrency=4):
+        '''Fetches a keyword report as concurrent date-range shards merged into one response.
+        shard: 'DAY', 'WEEK', 'MONTH' or a number of days.
+        '''
+        return await sharded_report(functools.partial(self.get_keyword_level_reports, campaign_id), data, shard, concurrency)
+
+    async def get_search_term_level_reports(self, campaign_id, data, transform=None, aggregate=None):
         '''Fetches reports for search terms within a campaign.
         docs:https://developer.apple.com/documentation/apple_search_ads/get_search_term-level_reports
         data:{
@@ -681,9 +1260,25 @@ class AioSearchAds:
             }
         '''
         resource = 'reports/campaigns/%s/searchterms' % campaign_id
-        return await self.call('post', resource, json=data)
+        return await self.call('post', resource, transform, aggregate, json=data)
+
+    def iter_search_term_level_reports(self, campaign_id, data, prefetch=True, transform=None, stream=False):
+        '''Streams every search term report row across pages; see ReportStream.
+        stream: parse each page incrementally as it arrives; see StreamingReport.
+        Streamed pages are fetched one after the other, so prefetch does not apply.
+        '''
+        if stream:
+            return self.stream_report('reports/campaigns/%s/searchterms' % campaign_id, data, transform=transform)
+        return ReportStream(functools.partial(self.get_search_term_level_reports, campaign_id, transform=transform),
+                            data, prefetch)
 
-    async def get_creative_set_level_reports(self, campaign_id, data):
+    async def get_search_term_level_reports_sharded(self, campaign_id, data, shard='WEEK', concurrency=4):
+        '''Fetches a search term report as concurrent date-range shards merged into one response.
+        shard: 'DAY', 'WEEK', 'MONTH' or a number of days.
+        '''
+        return await sharded_report(functools.partial(self.get_search_term_level_reports, campaign_id), data, shard, concurrency)
+
+    async def get_creative_set_level_reports(self, campaign_id, data, transform=None, aggregate=None):
         '''Fetches reports for Creative Sets within a campaign.
         docs:https://developer.apple.com/documentation/apple_search_ads/get_creative_set-level_reports
         data:{
@@ -720,4 +1315,20 @@ class AioSearchAds:
             }
         '''
         resource = 'reports/campaigns/%s/creativesets' % campaign_id
-        return await self.call('post', resource, json=data)
+        return await self.call('post', resource, transform, aggregate, json=data)
+
+    def iter_creative_set_level_reports(self, campaign_id, data, prefetch=True, transform=None, stream=False):
+        '''Streams every Creative Set report row across pages; see ReportStream.
+        stream: parse each page incrementally as it arrives; see StreamingReport.
+        Streamed pages are fetched one after the other, so prefetch does not apply.
+        '''
+        if stream:
+            return self.stream_report('reports/campaigns/%s/creativesets' % campaign_id, data, transform=transform)
+        return ReportStream(functools.partial(self.get_creative_set_level_reports, campaign_id, transform=transform),
+                            data, prefetch)
+
+    async def get_creative_set_level_reports_sharded(self, campaign_id, data, shard='WEEK', concurrency=4):
+        '''Fetches a Creative Set report as concurrent date-range shards merged into one response.
+        shard: 'DAY', 'WEEK', 'MONTH' or a number of days.
+        '''
+        return await sharded_report(functools.partial(self.get_creative_set_level_reports, campaign_id), data, shard, concurrency)
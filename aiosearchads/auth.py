@@ -0,0 +1,75 @@
+'''Client secret cache
+'''
+import os
+import json
+import time
+import functools
+
+try:
+    from cryptography.hazmat.primitives.serialization import load_pem_private_key
+except ImportError:
+    load_pem_private_key = None
+
+
+@functools.lru_cache(maxsize=64)
+def load_private_key(pem):
+    '''Parse a PEM private key (str or bytes) once per process.
+    falls back to the PEM as given when cryptography is unavailable.
+    '''
+    if load_pem_private_key is None:
+        return pem
+    if isinstance(pem, str):
+        pem = pem.encode('utf-8')
+    return load_pem_private_key(pem.strip(), password=None)
+
+
+class SecretCache:
+    '''Signed client secrets keyed by (client_id, team_id, key_id).
+    path: optional JSON file so short-lived worker processes reuse a secret.
+    margin: seconds before expiry at which a secret is signed again.
+    '''
+
+    def __init__(self, path=None, margin=86400):
+        self.path = path
+        self.margin = margin
+        self._secrets = {}
+
+    def get(self, key):
+        '''Return a cached secret that is not close to expiry, or None.
+        '''
+        entry = self._secrets.get(key)
+        if entry is None and self.path:
+            entry = self._load().get(key)
+            if entry is not None:
+                self._secrets[key] = entry
+        if entry is not None and entry[1] - self.margin > time.time():
+            return entry[0]
+        return None
+
+    def set(self, key, secret, expires_at):
+        '''Store a freshly signed secret.
+        '''
+        self._secrets[key] = (secret, expires_at)
+        if self.path:
+            self._dump(key, secret, expires_at)
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as fp:
+                raw = json.load(fp)
+        except (OSError, ValueError):
+            return {}
+        return {tuple(k.split(':')): tuple(v) for k, v in raw.items()}
+
+    def _dump(self, key, secret, expires_at):
+        entries = self._load()
+        entries[key] = (secret, expires_at)
+        raw = {':'.join(k): list(v) for k, v in entries.items()}
+        tmp = '%s.%s.tmp' % (self.path, os.getpid())
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as fp:
+            json.dump(raw, fp)
+        os.replace(tmp, self.path)
+
+
+default_secret_cache = SecretCache()
@@ -0,0 +1,139 @@
+'''Vectorized bid management
+'''
+import asyncio
+from .columnar import ReportColumns, _require
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class BidOptimizer:
+    '''Recomputes the targeting keyword bids of one campaign with numpy.
+    load() aligns keyword report metrics with the current keywords, compute()
+    applies the rules to the whole campaign at once and apply() sends only
+    the changed bids through bulk_update_targeting_keywords.
+    target_cpa: scale bids by target_cpa / observed CPA.
+    target_roas: scale bids by observed ROAS / target_roas (needs revenue).
+    max_step: largest relative change per run, e.g. 0.25 for +/-25%.
+    min_bid/max_bid: absolute clamps applied last.
+    min_taps: keywords with fewer taps keep their bid.
+    rules: extra callables rule(frame, bids) -> bids run after the targets.
+    '''
+
+    def __init__(self, client, campaign_id, target_cpa=None, target_roas=None,
+                 max_step=0.25, min_bid=None, max_bid=None, min_taps=0, rules=()):
+        self.client = client
+        self.campaign_id = campaign_id
+        self.target_cpa = target_cpa
+        self.target_roas = target_roas
+        self.max_step = max_step
+        self.min_bid = min_bid
+        self.max_bid = max_bid
+        self.min_taps = min_taps
+        self.rules = rules
+        self.frame = None
+        self.bids = None
+
+    async def load(self, report_data, revenue=None):
+        '''Fetch keyword state and report metrics into aligned arrays.
+        revenue: optional {keyword_id: revenue} for target_roas.
+        '''
+        np = _require(numpy, 'numpy')
+        ids, adgroups, bids, currencies = [], [], [], []
+        async for keyword in self.client.iter_find_targeting_keywords(self.campaign_id):
+            if keyword.get('deleted') or not keyword.get('bidAmount'):
+                continue
+            ids.append(keyword['id'])
+            adgroups.append(keyword['adGroupId'])
+            bids.append(float(keyword['bidAmount']['amount']))
+            currencies.append(keyword['bidAmount']['currency'])
+        frame = {'id': np.array(ids, dtype=np.int64),
+                 'adGroupId': np.array(adgroups, dtype=np.int64),
+                 'bid': np.array(bids, dtype=np.float64),
+                 'currency': np.array(currencies, dtype=object)}
+        report = await ReportColumns.from_stream(
+            self.client.iter_keyword_level_reports(self.campaign_id, report_data))
+        order = np.argsort(frame['id'])
+        for name in ('localSpend', 'installs', 'taps', 'impressions'):
+            frame[name] = np.zeros(len(ids), dtype=np.float64)
+        if len(report) and len(ids):
+            report = report.to_numpy()
+            position = np.searchsorted(frame['id'], report['keywordId'], sorter=order)
+            position = np.clip(position, 0, len(ids) - 1)
+            found = frame['id'][order[position]] == report['keywordId']
+            target = order[position[found]]
+            for name in ('localSpend', 'installs', 'taps', 'impressions'):
+                if name in report:
+                    np.add.at(frame[name], target, np.nan_to_num(report[name][found].astype(np.float64)))
+        frame['revenue'] = np.zeros(len(ids), dtype=np.float64)
+        if revenue:
+            frame['revenue'] = np.array([revenue.get(i, 0.0) for i in ids], dtype=np.float64)
+        self.frame = frame
+        return frame
+
+    def compute(self):
+        '''New bids for every loaded keyword, rounded to cents.
+        '''
+        np = _require(numpy, 'numpy')
+        frame = self.frame
+        current = frame['bid']
+        bids = current.copy()
+        spend = frame['localSpend']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if self.target_cpa is not None:
+                cpa = spend / frame['installs']
+                scale = np.where(frame['installs'] > 0, self.target_cpa / cpa,
+                                 np.where(spend > self.target_cpa, 0.0, 1.0))
+                bids = bids * scale
+            if self.target_roas is not None:
+                roas = frame['revenue'] / spend
+                bids = np.where(spend > 0, bids * roas / self.target_roas, bids)
+        bids = np.where(frame['taps'] >= self.min_taps, bids, current)
+        for rule in self.rules:
+            bids = rule(frame, bids)
+        if self.max_step is not None:
+            bids = np.clip(bids, current * (1 - self.max_step), current * (1 + self.max_step))
+        if self.min_bid is not None or self.max_bid is not None:
+            bids = np.clip(bids, self.min_bid, self.max_bid)
+        self.bids = np.round(bids, 2)
+        return self.bids
+
+    def changes(self):
+        '''{adgroup_id: [update item, ...]} for bids that moved by a cent or more.
+        '''
+        np = _require(numpy, 'numpy')
+        if self.bids is None:
+            self.compute()
+        frame = self.frame
+        changed = np.nonzero(np.abs(self.bids - frame['bid']) >= 0.005)[0]
+        updates = {}
+        for i in changed.tolist():
+            updates.setdefault(int(frame['adGroupId'][i]), []).append({
+                'id': int(frame['id'][i]),
+                'bidAmount': {'amount': '%.2f' % self.bids[i], 'currency': frame['currency'][i]}})
+        return updates
+
+    async def apply(self, chunk_size=1000, concurrency=4):
+        '''Send the changed bids; returns {adgroup_id: BulkResult}.
+        '''
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def update(adgroup_id, items):
+            async with semaphore:
+                return await self.client.bulk_update_targeting_keywords(
+                    self.campaign_id, adgroup_id, items, chunk_size, 1)
+        changes = self.changes()
+        results = await asyncio.gather(*[update(adgroup_id, items)
+                                         for adgroup_id, items in changes.items()])
+        return dict(zip(changes, results))
+
+    async def run(self, report_data, revenue=None, dry_run=False):
+        '''load(), compute() and, unless dry_run, apply().
+        '''
+        await self.load(report_data, revenue)
+        self.compute()
+        if dry_run:
+            return self.changes()
+        return await self.apply()
@@ -0,0 +1,92 @@
+'''Chunked bulk operations
+'''
+import re
+import asyncio
+from .transport import TRANSPORT_ERRORS
+
+_INDEX = re.compile(r'\[(\d+)\]')
+
+
+class BulkResult:
+    '''Outcome of a chunked bulk call, aligned with the input items.
+    data[i]: what the API returned for items[i] (e.g. the created keyword).
+    errors[i]: the error for items[i], or None when it succeeded.
+    '''
+
+    def __init__(self, items):
+        self.items = items
+        self.data = [None] * len(items)
+        self.errors = [None] * len(items)
+
+    @property
+    def ids(self):
+        '''Created/updated ids aligned with the input, None where unknown.
+        '''
+        return [d.get('id') if isinstance(d, dict) else None for d in self.data]
+
+    @property
+    def failed(self):
+        '''(item, error) pairs to fix and resubmit.
+        '''
+        return [(item, error) for item, error in zip(self.items, self.errors) if error is not None]
+
+    @property
+    def ok(self):
+        return all(error is None for error in self.errors)
+
+    def assign(self, offset, size, response):
+        '''Spread one chunk response over items[offset:offset + size].
+        errors whose field carries an index, e.g. "KeywordImport[3].text",
+        go to that item; any other error fails the whole chunk.
+        '''
+        if not isinstance(response, dict):
+            response = {'data': None, 'error': response}
+        data = response.get('data')
+        error = response.get('error')
+        if isinstance(error, dict):
+            errors = error.get('errors') or [error]
+        else:
+            errors = [error] if error else []
+        per_item = {}
+        general = []
+        for e in errors:
+            match = _INDEX.search(e.get('field') or '') if isinstance(e, dict) else None
+            if match and int(match.group(1)) < size:
+                per_item.setdefault(int(match.group(1)), []).append(e)
+            else:
+                general.append(e)
+        if general:
+            for i in range(size):
+                self.errors[offset + i] = general
+            return
+        succeeded = [i for i in range(size) if i not in per_item]
+        for i, errors in per_item.items():
+            self.errors[offset + i] = errors
+        if isinstance(data, list):
+            if len(data) == size:
+                indexes = range(size)
+            else:
+                indexes = succeeded
+            for i, d in zip(indexes, data):
+                self.data[offset + i] = d
+
+
+async def run_bulk(send, items, chunk_size=1000, concurrency=4):
+    '''Send items in chunks of chunk_size, at most `concurrency` at a time.
+    send(chunk) is one bulk endpoint call; returns a BulkResult.
+    '''
+    items = list(items)
+    result = BulkResult(items)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def chunk(offset):
+        size = min(chunk_size, len(items) - offset)
+        async with semaphore:
+            try:
+                response = await send(items[offset:offset + size])
+            except TRANSPORT_ERRORS as e:
+                response = {'data': None, 'error': e}
+        result.assign(offset, size, response)
+
+    await asyncio.gather(*[chunk(offset) for offset in range(0, len(items), chunk_size)])
+    return result
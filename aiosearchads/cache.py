@@ -0,0 +1,168 @@
+'''Response cache
+'''
+import json
+import time
+import asyncio
+import sqlite3
+import threading
+from collections import OrderedDict
+from .retry import is_read_only
+
+DEFAULT_TTLS = {
+    'acls': 300,
+    'campaigns': 60,
+    'creativeappassets': 3600,
+    'creativeappmappings': 86400,
+    'search/geo': 86400,
+}
+
+
+class MemoryBackend:
+    '''In-process LRU store bounded to maxsize entries.
+    cached responses are shared objects: treat them as read-only.
+    '''
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    async def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] < time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    async def set(self, key, value, ttl):
+        self._entries[key] = (value, time.time() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def delete_prefix(self, prefix):
+        for key in [k for k in self._entries if k.startswith(prefix)]:
+            del self._entries[key]
+
+
+class SqliteBackend:
+    '''SQLite store shared by every worker process on a host.
+    maxsize bounds the number of rows; the least recently used go first,
+    checked every evict_every writes so the table may briefly run over.
+    The connection may be used from any thread (e.g. the SyncSearchAds loop
+    thread), one statement group at a time.
+    executor: where the sqlite calls run, off the event loop; the loop's
+    default executor when None.
+    '''
+
+    def __init__(self, path, maxsize=100000, evict_every=100, executor=None):
+        self.path = path
+        self.maxsize = maxsize
+        self.evict_every = evict_every
+        self.executor = executor
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, '
+                         'value TEXT, expires REAL, used REAL)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS cache_used ON cache (used)')
+
+    def _get(self, key):
+        with self._lock:
+            row = self._db.execute('SELECT value, expires FROM cache WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if row[1] < now:
+                self._db.execute('DELETE FROM cache WHERE key = ?', (key,))
+                return None
+            self._db.execute('UPDATE cache SET used = ? WHERE key = ?', (now, key))
+        return json.loads(row[0])
+
+    def _set(self, key, value, ttl):
+        now = time.time()
+        value = json.dumps(value)
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)',
+                             (key, value, now + ttl, now))
+            self._writes += 1
+            if self._writes >= self.evict_every:
+                self._writes = 0
+                # walks the `used` index instead of sorting the table
+                self._db.execute('DELETE FROM cache WHERE used < (SELECT used FROM cache '
+                                 'ORDER BY used DESC LIMIT 1 OFFSET ?)', (self.maxsize - 1,))
+
+    def _delete_prefix(self, prefix):
+        escaped = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        with self._lock:
+            self._db.execute("DELETE FROM cache WHERE key LIKE ? ESCAPE '\\'", (escaped + '%',))
+
+    def _run(self, function, *args):
+        return asyncio.get_event_loop().run_in_executor(self.executor, function, *args)
+
+    async def get(self, key):
+        return await self._run(self._get, key)
+
+    async def set(self, key, value, ttl):
+        await self._run(self._set, key, value, ttl)
+
+    async def delete_prefix(self, prefix):
+        await self._run(self._delete_prefix, prefix)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class ResponseCache:
+    '''Caches successful GET responses per org with per-endpoint TTLs.
+    ttls: resource prefix -> seconds; the longest matching prefix wins and
+    resources matching none are not cached.
+    Any successful mutating call drops the cached entries of its resource
+    path and everything below it, e.g. update_campaigns(1) drops
+    get_campaign(1) and all_adgroups(1).
+    '''
+
+    def __init__(self, backend=None, ttls=None):
+        self.backend = backend or MemoryBackend()
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+
+    def ttl(self, resource):
+        matches = [p for p in self.ttls if resource == p or resource.startswith(p + '/')]
+        if not matches:
+            return None
+        return self.ttls[max(matches, key=len)]
+
+    def key(self, org_id, method, resource, kwargs):
+        '''Cache key of a call, or None when it is not cacheable.
+        '''
+        if method != 'GET' or self.ttl(resource) is None:
+            return None
+        params = sorted((kwargs.get('params') or {}).items())
+        body = json.dumps(kwargs.get('json'), sort_keys=True)
+        return '%s|%s?%s|%s' % (org_id, resource, json.dumps(params), body)
+
+    async def get(self, key):
+        return await self.backend.get(key)
+
+    async def set(self, key, resource, value):
+        await self.backend.set(key, value, self.ttl(resource))
+
+    async def invalidate(self, org_id, method, resource):
+        '''Drop entries touched by a successful mutating call.
+        '''
+        if is_read_only(method, resource):
+            return
+        for suffix in ('/delete/bulk', '/bulk'):
+            if resource.endswith(suffix):
+                resource = resource[:-len(suffix)]
+                break
+        await self.backend.delete_prefix('%s|%s?' % (org_id, resource))
+        await self.backend.delete_prefix('%s|%s/' % (org_id, resource))
+        collection, _, entity_id = resource.rpartition('/')
+        if method in ('PUT', 'DELETE') and collection and entity_id.isdigit():
+            # the listing pages of the collection embed the changed entity
+            await self.backend.delete_prefix('%s|%s?' % (org_id, collection))
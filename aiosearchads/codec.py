@@ -0,0 +1,74 @@
+'''JSON codecs
+'''
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+class StdlibCodec:
+    '''The stdlib json module.
+    '''
+    name = 'json'
+
+    def dumps(self, obj):
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def loads(self, body):
+        return json.loads(body)
+
+
+class OrjsonCodec:
+    '''orjson, decoding straight from bytes.
+    '''
+    name = 'orjson'
+
+    def dumps(self, obj):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, body):
+        return orjson.loads(body)
+
+
+class UjsonCodec:
+    '''ujson.
+    '''
+    name = 'ujson'
+
+    def dumps(self, obj):
+        return ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False).encode('utf-8')
+
+    def loads(self, body):
+        return ujson.loads(body)
+
+
+CODECS = {'json': StdlibCodec, 'orjson': OrjsonCodec, 'ujson': UjsonCodec}
+
+
+def available_codecs():
+    '''Names of the codecs whose module is installed, fastest first.
+    '''
+    names = []
+    if orjson is not None:
+        names.append('orjson')
+    if ujson is not None:
+        names.append('ujson')
+    names.append('json')
+    return names
+
+
+def get_codec(codec=None):
+    '''A codec instance from a name, an instance, or the fastest installed one.
+    '''
+    if codec is None:
+        codec = available_codecs()[0]
+    if isinstance(codec, str):
+        return CODECS[codec]()
+    return codec
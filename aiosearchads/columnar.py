@@ -0,0 +1,125 @@
+'''Columnar report results
+'''
+import importlib
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def _require(module, name):
+    if module is None:
+        raise ImportError('%s is required for this feature: pip install %s' % (name, name))
+    return module
+
+
+def _optional(name):
+    '''Import a heavy optional dependency (pandas, pyarrow) on first use,
+    so `import aiosearchads` does not pay for it; None when missing.
+    '''
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+class ReportColumns:
+    '''Report rows flattened into one list per column in a single pass.
+    A granular row gives one record per granularity entry (with its `date`),
+    otherwise the row total is used. metadata fields keep their names, nested
+    objects are flattened as `parent.child`, money fields become float
+    amounts and their currency goes to the `currency` column.
+    '''
+
+    def __init__(self):
+        self.columns = {}
+        self.size = 0
+
+    @classmethod
+    def from_rows(cls, rows):
+        columns = cls()
+        for row in rows:
+            columns.add_row(row)
+        return columns
+
+    @classmethod
+    async def from_stream(cls, stream):
+        '''Build from an async row iterator such as ReportStream, without
+        keeping the row dicts around.
+        '''
+        columns = cls()
+        async for row in stream:
+            columns.add_row(row)
+        return columns
+
+    def add_row(self, row):
+        metadata = row.get('metadata') or {}
+        entries = row.get('granularity') or [row.get('total') or {}]
+        for entry in entries:
+            record = {}
+            self._flatten(record, '', metadata)
+            self._flatten(record, '', entry)
+            self._append(record)
+
+    def _flatten(self, record, prefix, values):
+        for key, value in values.items():
+            name = prefix + key
+            if isinstance(value, dict):
+                if 'amount' in value and 'currency' in value:
+                    record[name] = float(value['amount'])
+                    record.setdefault('currency', value['currency'])
+                else:
+                    self._flatten(record, name + '.', value)
+            else:
+                record[name] = value
+
+    def _append(self, record):
+        columns = self.columns
+        for name, value in record.items():
+            column = columns.get(name)
+            if column is None:
+                column = columns[name] = [None] * self.size
+            column.append(value)
+        self.size += 1
+        for column in columns.values():
+            if len(column) < self.size:
+                column.append(None)
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def to_numpy(self):
+        '''dict of numpy arrays: int64 or float64 (nan for gaps) for numbers,
+        bool for flags and object for everything else.
+        '''
+        np = _require(numpy, 'numpy')
+        arrays = {}
+        for name, values in self.columns.items():
+            kinds = {type(v) for v in values}
+            if kinds <= {int}:
+                arrays[name] = np.array(values, dtype=np.int64)
+            elif kinds <= {int, float, type(None)}:
+                arrays[name] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+            elif kinds <= {bool}:
+                arrays[name] = np.array(values, dtype=bool)
+            else:
+                arrays[name] = np.array(values, dtype=object)
+        return arrays
+
+    def to_arrow(self):
+        '''pyarrow.Table with one column per field.
+        '''
+        pa = _require(_optional('pyarrow'), 'pyarrow')
+        return pa.table({name: pa.array(values) for name, values in self.columns.items()})
+
+    def to_pandas(self):
+        '''pandas.DataFrame with one column per field.
+        '''
+        pd = _require(_optional('pandas'), 'pandas')
+        if numpy is not None:
+            return pd.DataFrame(self.to_numpy())
+        return pd.DataFrame(self.columns)
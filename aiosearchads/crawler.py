@@ -0,0 +1,241 @@
+'''Full account snapshots
+'''
+import os
+import json
+import time
+import asyncio
+from .codec import get_codec
+from .columnar import _optional, _require
+from .mirror import ENTITIES
+from .pagination import page_entities, total_results, with_pagination
+
+
+class NdjsonOutput:
+    '''One `<entity>.ndjson` file per entity, one JSON object per line.
+    '''
+
+    def __init__(self, directory, codec=None):
+        self.directory = directory
+        self.codec = get_codec(codec)
+        self.files = {}
+
+    def path(self, entity):
+        return os.path.join(self.directory, '%s.ndjson' % entity)
+
+    def open(self, entities, state=None):
+        '''Start fresh, or cut every file back to a checkpointed state.
+        '''
+        sizes = (state or {}).get('sizes', {})
+        for entity in entities:
+            path = self.path(entity)
+            if state is None or not os.path.exists(path):
+                self.files[entity] = open(path, 'wb')
+                continue
+            fp = open(path, 'r+b')
+            fp.truncate(sizes.get(entity, 0))
+            fp.seek(0, os.SEEK_END)
+            self.files[entity] = fp
+
+    def write(self, entity, rows):
+        dumps = self.codec.dumps
+        self.files[entity].write(b''.join(dumps(row) + b'\n' for row in rows))
+
+    def commit(self):
+        '''Make everything written so far durable and return its state.
+        '''
+        sizes = {}
+        for entity, fp in self.files.items():
+            fp.flush()
+            os.fsync(fp.fileno())
+            sizes[entity] = fp.tell()
+        return {'sizes': sizes}
+
+    def close(self):
+        for fp in self.files.values():
+            fp.close()
+        self.files = {}
+
+
+class ParquetOutput:
+    '''A `<entity>/part-NNNNN.parquet` file per rows_per_file rows and per
+    checkpoint. Nested fields (e.g. bidAmount) are stored as JSON strings.
+    '''
+
+    def __init__(self, directory, rows_per_file=100000):
+        self.pyarrow = _require(_optional('pyarrow'), 'pyarrow')
+        self.parquet = _optional('pyarrow.parquet')
+        self.directory = directory
+        self.rows_per_file = rows_per_file
+        self.buffers = {}
+        self.parts = {}
+
+    def path(self, entity, part):
+        return os.path.join(self.directory, entity, 'part-%05d.parquet' % part)
+
+    def open(self, entities, state=None):
+        '''Start fresh, or drop the parts written after a checkpointed state.
+        '''
+        parts = (state or {}).get('parts', {})
+        for entity in entities:
+            os.makedirs(os.path.join(self.directory, entity), exist_ok=True)
+            self.parts[entity] = parts.get(entity, 0)
+            self.buffers[entity] = []
+            for name in os.listdir(os.path.join(self.directory, entity)):
+                if name.startswith('part-') and int(name[5:10]) >= self.parts[entity]:
+                    os.remove(os.path.join(self.directory, entity, name))
+
+    def write(self, entity, rows):
+        buffer = self.buffers[entity]
+        buffer.extend({key: json.dumps(value) if isinstance(value, (dict, list)) else value
+                       for key, value in row.items()} for row in rows)
+        if len(buffer) >= self.rows_per_file:
+            self._flush(entity)
+
+    def _flush(self, entity):
+        rows = self.buffers[entity]
+        if not rows:
+            return
+        self.parquet.write_table(self.pyarrow.Table.from_pylist(rows), self.path(entity, self.parts[entity]))
+        self.parts[entity] += 1
+        self.buffers[entity] = []
+
+    def commit(self):
+        for entity in self.buffers:
+            self._flush(entity)
+        return {'parts': dict(self.parts)}
+
+    def close(self):
+        self.commit()
+
+
+OUTPUTS = {'ndjson': NdjsonOutput, 'parquet': ParquetOutput}
+
+
+class Crawler:
+    '''Concurrent snapshot of every campaign, ad group, targeting keyword,
+    campaign and ad group negative keyword and ad group Creative Set of an org.
+    Pages are a work queue drained by `concurrency` workers: the first page
+    of a listing queues the rest, each campaign queues its child listings.
+    Entities are written to `directory` as pages arrive and the queue is
+    checkpointed with the output every checkpoint_interval seconds, so
+    run() after a crash resumes where that checkpoint left off; after a
+    finished crawl it starts a new snapshot.
+    output: 'ndjson', 'parquet' or an output object like NdjsonOutput.
+    '''
+
+    def __init__(self, client, directory, output='ndjson', concurrency=8, limit=1000,
+                 checkpoint_interval=10, entities=ENTITIES):
+        os.makedirs(directory, exist_ok=True)
+        self.client = client
+        self.directory = directory
+        self.output = OUTPUTS[output](directory) if isinstance(output, str) else output
+        self.concurrency = concurrency
+        self.limit = limit
+        self.checkpoint_interval = checkpoint_interval
+        self.entities = ('campaigns',) + tuple(e for e in entities if e != 'campaigns')
+        self.checkpoint_path = os.path.join(directory, 'checkpoint.json')
+        self.pending = {}
+        self.counts = {}
+        self._queue = None
+        self._checkpointed = 0
+
+    def load_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path):
+            return None
+        with open(self.checkpoint_path) as fp:
+            return json.load(fp)
+
+    def checkpoint(self, done=False):
+        '''Persist the output and the pages still to do, atomically.
+        done: the crawl finished, there is nothing to resume.
+        '''
+        state = {'pending': list(self.pending.values()), 'counts': self.counts,
+                 'output': self.output.commit(), 'done': done}
+        tmp = '%s.%s.tmp' % (self.checkpoint_path, os.getpid())
+        with open(tmp, 'w') as fp:
+            json.dump(state, fp)
+        os.replace(tmp, self.checkpoint_path)
+        self._checkpointed = time.monotonic()
+
+    def _fetch(self, entity, campaign_id, offset):
+        client, limit = self.client, self.limit
+        if entity == 'campaigns':
+            return client.find_campaigns(offset, limit)
+        if entity == 'adgroups':
+            return client.find_adgroups(campaign_id, offset, limit, [], [])
+        if entity == 'targeting_keywords':
+            return client.find_targeting_keywords(campaign_id, offset, limit, [], [])
+        if entity == 'negative_keywords':
+            return client.find_negative_keywords(campaign_id, offset, limit, [], [])
+        if entity == 'adgroup_negative_keywords':
+            return client.find_adgroup_negative_keywords(campaign_id, offset, limit, [], [])
+        if entity == 'adgroup_creativesets':
+            return client.find_adgroup_creativesets(campaign_id, with_pagination({}, offset, limit))
+        raise ValueError('Unknown entity %r' % entity)
+
+    def _queue_page(self, task):
+        self.pending['%s|%s|%s' % tuple(task)] = task
+        self._queue.put_nowait(task)
+
+    async def _page(self, task):
+        entity, campaign_id, offset = task
+        page = await self._fetch(entity, campaign_id, offset)
+        rows = page_entities(page)
+        # from here on no await: output, counts and queue move together
+        self.output.write(entity, rows)
+        self.counts[entity] = self.counts.get(entity, 0) + len(rows)
+        del self.pending['%s|%s|%s' % tuple(task)]
+        if offset == 0:
+            for next_offset in range(self.limit, total_results(page), self.limit):
+                self._queue_page([entity, campaign_id, next_offset])
+        if entity == 'campaigns':
+            for row in rows:
+                for child in self.entities[1:]:
+                    self._queue_page([child, row['id'], 0])
+        if time.monotonic() - self._checkpointed >= self.checkpoint_interval:
+            self.checkpoint()
+
+    async def _worker(self, failed):
+        while True:
+            task = await self._queue.get()
+            try:
+                await self._page(task)
+            except Exception as e:
+                if not failed.done():
+                    failed.set_exception(e)
+            finally:
+                self._queue.task_done()
+
+    async def run(self, resume=True):
+        '''Crawl the org, or finish an interrupted crawl; returns entities written per type.
+        A failing page stops the crawl after a last checkpoint and is raised.
+        '''
+        state = self.load_checkpoint() if resume else None
+        if state is not None and (state.get('done') or not state['pending']):
+            state = None
+        self.output.open(self.entities, state and state['output'])
+        self._queue = asyncio.Queue()
+        self.pending = {}
+        if state is None:
+            self.counts = dict.fromkeys(self.entities, 0)
+            self._queue_page(['campaigns', None, 0])
+        else:
+            self.counts = state['counts']
+            for task in state['pending']:
+                self._queue_page(task)
+        failed = asyncio.get_event_loop().create_future()
+        workers = [asyncio.ensure_future(self._worker(failed)) for _ in range(self.concurrency)]
+        drained = asyncio.ensure_future(self._queue.join())
+        done = False
+        try:
+            await asyncio.wait([drained, failed], return_when=asyncio.FIRST_COMPLETED)
+            done = not failed.done()
+        finally:
+            for task in workers + [drained]:
+                task.cancel()
+            await asyncio.gather(*workers, drained, return_exceptions=True)
+            self.checkpoint(done)
+            self.output.close()
+        if failed.done():
+            raise failed.exception()
+        return dict(self.counts)
@@ -0,0 +1,12 @@
+'''Errors
+'''
+
+
+class SearchAdsError(Exception):
+    '''Raised by helpers that need a successful response to continue.
+    response: the decoded error body returned by the API.
+    '''
+
+    def __init__(self, response):
+        self.response = response
+        super().__init__(response)
@@ -0,0 +1,131 @@
+'''Rate limiting
+'''
+import time
+import asyncio
+
+
+def resource_family(resource):
+    '''Endpoint family of a resource path, e.g. 'campaigns' or 'reports'.
+    '''
+    return resource.split('/', 1)[0]
+
+
+def retry_after(headers, default=1.0):
+    '''Seconds to wait from a Retry-After header.
+    '''
+    value = headers.get('Retry-After') if headers else None
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return default
+
+
+class TokenBucket:
+    '''Token bucket refilled at `rate` per second up to `burst`.
+    '''
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0
+
+    def block(self, seconds):
+        '''Hold every acquire for `seconds`, as asked by Retry-After.
+        '''
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                await asyncio.sleep(self.blocked_until - now)
+                continue
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class RateLimiter:
+    '''Token bucket per (org_id, endpoint family) plus an adaptive in-flight cap.
+    rate/burst: requests per second and burst size of each bucket.
+    max_in_flight/min_in_flight: bounds of the concurrency limit, which is
+    halved on a 429 and grows by one after `limit` fast successes; a response
+    slower than twice the average latency of its endpoint family lowers it by one.
+    max_retries: times a 429 is retried after waiting for Retry-After.
+    '''
+
+    def __init__(self, rate=10, burst=20, max_in_flight=32, min_in_flight=1,
+                 max_retries=3, family=resource_family):
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.min_in_flight = min_in_flight
+        self.max_retries = max_retries
+        self.family = family
+        self.limit = max_in_flight
+        self.in_flight = 0
+        self.latency = {}
+        self.throttled = 0
+        self._successes = 0
+        self._buckets = {}
+        self._condition = None
+
+    def bucket(self, org_id, resource):
+        key = (org_id, self.family(resource))
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    async def _enter(self):
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        async with self._condition:
+            while self.in_flight >= self.limit:
+                await self._condition.wait()
+            self.in_flight += 1
+
+    async def _exit(self):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def _observe(self, status, elapsed, family=None):
+        if status == 429:
+            self.throttled += 1
+            self._successes = 0
+            self.limit = max(self.min_in_flight, self.limit // 2)
+            return
+        # families differ by orders of magnitude (reports vs a single GET): average each apart
+        latency = self.latency.get(family)
+        if latency is not None and elapsed > 2 * latency:
+            self.limit = max(self.min_in_flight, self.limit - 1)
+        else:
+            self._successes += 1
+            if self._successes >= self.limit:
+                self._successes = 0
+                self.limit = min(self.max_in_flight, self.limit + 1)
+        self.latency[family] = elapsed if latency is None else 0.8 * latency + 0.2 * elapsed
+
+    async def run(self, org_id, resource, send):
+        '''Run send() -> (status, headers, data) within the limits.
+        '''
+        bucket = self.bucket(org_id, resource)
+        for attempt in range(self.max_retries + 1):
+            await bucket.acquire()
+            await self._enter()
+            try:
+                started = time.monotonic()
+                status, headers, data = await send()
+                self._observe(status, time.monotonic() - started, self.family(resource))
+            finally:
+                await self._exit()
+            if status != 429:
+                break
+            bucket.block(retry_after(headers))
+        return status, headers, data
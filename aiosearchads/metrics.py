@@ -0,0 +1,253 @@
+'''Request instrumentation
+'''
+import time
+import aiohttp
+from .limiter import resource_family
+from .columnar import _require
+
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
+try:
+    from opentelemetry import metrics as otel_metrics
+except ImportError:
+    otel_metrics = None
+
+
+def url_family(url, api_url, token_url):
+    '''Endpoint family of a request url: 'token', 'campaigns', 'reports', ...
+    '''
+    if url.startswith(token_url):
+        return 'token'
+    if not url.startswith(api_url):
+        return 'other'
+    parts = url[len(api_url):].split('?', 1)[0].strip('/').split('/', 1)
+    return resource_family(parts[1]) if len(parts) > 1 else 'other'
+
+
+class Sample:
+    '''Timings in seconds and sizes in bytes of one HTTP round trip.
+    phases: any of dns, queue (waiting for a pooled connection), connect
+    (TCP and TLS handshake), ttfb (start to response headers), read, decode
+    and total; dns, queue and connect only appear when they happened.
+    status is None and error set when the request raised.
+    '''
+    __slots__ = ('family', 'method', 'status', 'error', 'phases', 'sent', 'received',
+                 'started', '_mark', '_phase_started')
+
+    def __init__(self, family, method, sent=0):
+        self.family = family
+        self.method = method
+        self.status = None
+        self.error = None
+        self.phases = {}
+        self.sent = sent
+        self.received = 0
+        self.started = self._mark = time.perf_counter()
+        self._phase_started = {}
+
+    def begin(self, phase):
+        self._phase_started[phase] = time.perf_counter()
+
+    def end(self, phase):
+        started = self._phase_started.pop(phase, None)
+        if started is not None:
+            self.phases[phase] = time.perf_counter() - started
+
+    def headers(self):
+        '''Response headers are in.
+        '''
+        self._mark = time.perf_counter()
+        self.phases['ttfb'] = self._mark - self.started
+
+    def lap(self, phase):
+        '''Time since the previous mark, e.g. the body read after the headers.
+        '''
+        now = time.perf_counter()
+        self.phases[phase] = now - self._mark
+        self._mark = now
+
+
+class MetricsSink:
+    '''Receives instrumentation events; override the ones you need.
+    '''
+
+    def on_request(self, sample):
+        pass
+
+    def on_token_refresh(self, seconds, ok):
+        pass
+
+
+class StatsSink(MetricsSink):
+    '''In-memory totals per endpoint family, read with snapshot().
+    '''
+
+    def __init__(self):
+        self.families = {}
+        self.token_refreshes = {'ok': 0, 'failed': 0, 'seconds': 0.0}
+
+    def on_request(self, sample):
+        stats = self.families.get(sample.family)
+        if stats is None:
+            stats = self.families[sample.family] = {
+                'requests': 0, 'statuses': {}, 'throttled': 0, 'errors': 0,
+                'sent': 0, 'received': 0, 'seconds': {}, 'max_seconds': {}, 'samples': {}}
+        stats['requests'] += 1
+        if sample.error is not None:
+            stats['errors'] += 1
+        else:
+            stats['statuses'][sample.status] = stats['statuses'].get(sample.status, 0) + 1
+            if sample.status == 429:
+                stats['throttled'] += 1
+        stats['sent'] += sample.sent
+        stats['received'] += sample.received
+        seconds, max_seconds, samples = stats['seconds'], stats['max_seconds'], stats['samples']
+        for phase, value in sample.phases.items():
+            # not every request goes through every phase (e.g. connect on a reused connection)
+            seconds[phase] = seconds.get(phase, 0.0) + value
+            samples[phase] = samples.get(phase, 0) + 1
+            if value > max_seconds.get(phase, 0.0):
+                max_seconds[phase] = value
+
+    def on_token_refresh(self, seconds, ok):
+        self.token_refreshes['ok' if ok else 'failed'] += 1
+        self.token_refreshes['seconds'] += seconds
+
+    def snapshot(self):
+        '''Per family totals with the mean seconds of each phase, over the
+        requests that went through that phase.
+        '''
+        families = {}
+        for family, stats in self.families.items():
+            families[family] = dict(stats, statuses=dict(stats['statuses']),
+                                    max_seconds=dict(stats['max_seconds']),
+                                    mean_seconds={phase: value / stats['samples'][phase]
+                                                  for phase, value in stats['seconds'].items()})
+            del families[family]['seconds'], families[family]['samples']
+        return {'families': families, 'token_refreshes': dict(self.token_refreshes)}
+
+
+class PrometheusSink(MetricsSink):
+    '''prometheus_client counters and histograms, labelled by endpoint family.
+    registry: CollectorRegistry to register with, the default one otherwise.
+    '''
+
+    def __init__(self, registry=None, namespace='searchads', buckets=None):
+        prometheus = _require(prometheus_client, 'prometheus_client')
+        options = {'namespace': namespace}
+        if registry is not None:
+            options['registry'] = registry
+        histogram = dict(options, buckets=buckets) if buckets else options
+        self.requests = prometheus.Counter(
+            'requests_total', 'Search Ads api requests.', ['family', 'method', 'status'], **options)
+        self.seconds = prometheus.Histogram(
+            'request_phase_seconds', 'Search Ads api request phases.', ['family', 'phase'], **histogram)
+        self.bytes = prometheus.Counter(
+            'request_bytes_total', 'Search Ads api request and response bytes.', ['family', 'direction'],
+            **options)
+        self.throttled = prometheus.Counter(
+            'throttled_total', 'Search Ads api 429 responses.', ['family'], **options)
+        self.token_refreshes = prometheus.Counter(
+            'token_refreshes_total', 'Access token refreshes.', ['outcome'], **options)
+
+    def on_request(self, sample):
+        status = 'error' if sample.error is not None else str(sample.status)
+        self.requests.labels(sample.family, sample.method, status).inc()
+        for phase, value in sample.phases.items():
+            self.seconds.labels(sample.family, phase).observe(value)
+        self.bytes.labels(sample.family, 'sent').inc(sample.sent)
+        self.bytes.labels(sample.family, 'received').inc(sample.received)
+        if sample.status == 429:
+            self.throttled.labels(sample.family).inc()
+
+    def on_token_refresh(self, seconds, ok):
+        self.token_refreshes.labels('ok' if ok else 'failed').inc()
+
+
+class OpenTelemetrySink(MetricsSink):
+    '''OpenTelemetry instruments with family/phase/status attributes.
+    meter: the Meter to create instruments on, the global 'aiosearchads' one otherwise.
+    '''
+
+    def __init__(self, meter=None):
+        if meter is None:
+            meter = _require(otel_metrics, 'opentelemetry-api').get_meter('aiosearchads')
+        self.duration = meter.create_histogram(
+            'searchads.client.phase.duration', unit='s', description='Search Ads api request phases.')
+        self.requests = meter.create_counter(
+            'searchads.client.requests', description='Search Ads api requests.')
+        self.bytes = meter.create_counter(
+            'searchads.client.bytes', unit='By', description='Search Ads api request and response bytes.')
+        self.throttled = meter.create_counter(
+            'searchads.client.throttled', description='Search Ads api 429 responses.')
+        self.token_refreshes = meter.create_counter(
+            'searchads.client.token_refreshes', description='Access token refreshes.')
+
+    def on_request(self, sample):
+        status = 'error' if sample.error is not None else str(sample.status)
+        self.requests.add(1, {'family': sample.family, 'method': sample.method, 'status': status})
+        for phase, value in sample.phases.items():
+            self.duration.record(value, {'family': sample.family, 'phase': phase})
+        self.bytes.add(sample.sent, {'family': sample.family, 'direction': 'sent'})
+        self.bytes.add(sample.received, {'family': sample.family, 'direction': 'received'})
+        if sample.status == 429:
+            self.throttled.add(1, {'family': sample.family})
+
+    def on_token_refresh(self, seconds, ok):
+        self.token_refreshes.add(1, {'outcome': 'ok' if ok else 'failed'})
+
+
+class Instrumentation:
+    '''Times the client's round trips and hands them to one or more sinks.
+    Connection level phases come from an aiohttp TraceConfig installed on
+    the pooled session; one-off requests only report ttfb, read and decode.
+    '''
+
+    def __init__(self, *sinks):
+        self.sinks = sinks or (StatsSink(),)
+
+    def trace_config(self):
+        config = aiohttp.TraceConfig()
+        for phase, start, end in (
+                ('dns', config.on_dns_resolvehost_start, config.on_dns_resolvehost_end),
+                ('queue', config.on_connection_queued_start, config.on_connection_queued_end),
+                ('connect', config.on_connection_create_start, config.on_connection_create_end)):
+            start.append(self._trace(phase, Sample.begin))
+            end.append(self._trace(phase, Sample.end))
+        return config
+
+    @staticmethod
+    def _trace(phase, mark):
+        async def hook(session, context, params):
+            sample = context.trace_request_ctx
+            if isinstance(sample, Sample):
+                mark(sample, phase)
+        return hook
+
+    def start(self, family, method, data=None):
+        sent = len(data) if isinstance(data, (bytes, bytearray, str)) else 0
+        return Sample(family, method, sent)
+
+    def finish(self, sample, status=None, error=None):
+        sample.status = status
+        sample.error = error
+        sample.phases['total'] = time.perf_counter() - sample.started
+        for sink in self.sinks:
+            sink.on_request(sample)
+
+    def token_refresh(self, seconds, ok):
+        for sink in self.sinks:
+            sink.on_token_refresh(seconds, ok)
+
+
+def get_instrumentation(metrics=None):
+    '''An Instrumentation from a sink, a list of sinks or an Instrumentation; None stays off.
+    '''
+    if metrics is None or isinstance(metrics, Instrumentation):
+        return metrics
+    if isinstance(metrics, (list, tuple)):
+        return Instrumentation(*metrics)
+    return Instrumentation(metrics)
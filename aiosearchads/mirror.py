@@ -0,0 +1,158 @@
+'''Local mirror of the account hierarchy
+'''
+import json
+import asyncio
+import sqlite3
+import datetime
+
+ENTITIES = ('campaigns', 'adgroups', 'targeting_keywords', 'negative_keywords',
+            'adgroup_negative_keywords', 'adgroup_creativesets')
+
+
+def modified_since(since):
+    '''find_* condition selecting entities modified after `since`.
+    '''
+    if not since:
+        return []
+    return [{'field': 'modificationTime', 'operator': 'GREATER_THAN', 'values': [since]}]
+
+
+def _earlier(timestamp, seconds):
+    '''An api date-time (2020-04-08T21:03:58.834) moved `seconds` back.
+    '''
+    moment = datetime.datetime.strptime(timestamp[:19], '%Y-%m-%dT%H:%M:%S')
+    return (moment - datetime.timedelta(seconds=seconds)).strftime('%Y-%m-%dT%H:%M:%S') + timestamp[19:]
+
+
+class Mirror:
+    '''SQLite copy of campaigns, ad groups, targeting keywords, campaign and
+    ad group negative keywords and ad group Creative Sets of one org.
+    The first sync() lists everything; later ones only fetch entities whose
+    modificationTime is past the watermark of the previous run.
+    concurrency: campaigns synced at the same time.
+    overlap: seconds the watermark is set back, so entities changed while a
+    run was listing other campaigns are fetched again by the next one.
+    '''
+
+    def __init__(self, client, path, concurrency=8, overlap=300):
+        self.client = client
+        self.path = path
+        self.concurrency = concurrency
+        self.overlap = overlap
+        self._db = sqlite3.connect(path)
+        for entity in ENTITIES:
+            self._db.execute('CREATE TABLE IF NOT EXISTS %s (id INTEGER PRIMARY KEY, '
+                             'campaign_id INTEGER, adgroup_id INTEGER, deleted INTEGER, '
+                             'modification_time TEXT, data TEXT)' % entity)
+            self._db.execute('CREATE INDEX IF NOT EXISTS %s_parent ON %s '
+                             '(campaign_id, adgroup_id)' % (entity, entity))
+        self._db.execute('CREATE TABLE IF NOT EXISTS watermarks (entity TEXT PRIMARY KEY, value TEXT)')
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+    def watermark(self, entity):
+        row = self._db.execute('SELECT value FROM watermarks WHERE entity = ?', (entity,)).fetchone()
+        return row[0] if row else None
+
+    def _store(self, entity, rows, latest):
+        self._db.executemany(
+            'INSERT OR REPLACE INTO %s VALUES (?, ?, ?, ?, ?, ?)' % entity,
+            [(row['id'], row.get('campaignId', row['id'] if entity == 'campaigns' else None),
+              row.get('adGroupId', row['id'] if entity == 'adgroups' else None),
+              int(bool(row.get('deleted'))), row.get('modificationTime'), json.dumps(row))
+             for row in rows])
+        for row in rows:
+            modified = row.get('modificationTime')
+            if modified and (latest.get(entity) is None or modified > latest[entity]):
+                latest[entity] = modified
+
+    async def _collect(self, entity, iterator, latest, counts):
+        rows = []
+        async for row in iterator:
+            rows.append(row)
+            if len(rows) >= 1000:
+                self._store(entity, rows, latest)
+                counts[entity] += len(rows)
+                rows = []
+        self._store(entity, rows, latest)
+        counts[entity] += len(rows)
+
+    async def _sync_campaign(self, campaign_id, marks, latest, counts):
+        client = self.client
+        await asyncio.gather(
+            self._collect('adgroups', client.iter_find_adgroups(
+                campaign_id, conditions=modified_since(marks['adgroups'])), latest, counts),
+            self._collect('targeting_keywords', client.iter_find_targeting_keywords(
+                campaign_id, conditions=modified_since(marks['targeting_keywords'])), latest, counts),
+            self._collect('negative_keywords', client.iter_find_negative_keywords(
+                campaign_id, conditions=modified_since(marks['negative_keywords'])), latest, counts),
+            self._collect('adgroup_negative_keywords', client.iter_find_adgroup_negative_keywords(
+                campaign_id, conditions=modified_since(marks['adgroup_negative_keywords'])), latest, counts),
+            self._collect('adgroup_creativesets', client.iter_find_adgroup_creativesets(
+                campaign_id, {'conditions': modified_since(marks['adgroup_creativesets'])}), latest, counts),
+        )
+
+    async def sync(self):
+        '''Bring the mirror up to date; returns the rows written per entity.
+        watermarks only move forward, once every campaign synced successfully:
+        to the newest modificationTime seen, capped at the start of the run,
+        less `overlap`; rows fetched twice are simply written again.
+        '''
+        started = datetime.datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3]
+        marks = {entity: self.watermark(entity) for entity in ENTITIES}
+        latest = {}
+        counts = dict.fromkeys(ENTITIES, 0)
+        try:
+            await self._collect('campaigns', self.client.iter_find_campaigns(
+                conditions=modified_since(marks['campaigns'])), latest, counts)
+            campaign_ids = [row[0] for row in self._db.execute('SELECT id FROM campaigns')]
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def one(campaign_id):
+                async with semaphore:
+                    await self._sync_campaign(campaign_id, marks, latest, counts)
+            await asyncio.gather(*[one(campaign_id) for campaign_id in campaign_ids])
+            # listings run concurrently: a change made during the run can be older
+            # than the newest row another listing returned afterwards
+            for entity, value in latest.items():
+                mark = _earlier(min(value, started), self.overlap)
+                if marks[entity] is None or mark > marks[entity]:
+                    self._db.execute('INSERT OR REPLACE INTO watermarks VALUES (?, ?)', (entity, mark))
+        finally:
+            self._db.commit()
+        return counts
+
+    def query(self, entity, campaign_id=None, adgroup_id=None, include_deleted=False):
+        '''Entities of one table from the local store, without any api call.
+        '''
+        sql = 'SELECT data FROM %s WHERE 1 = 1' % entity
+        args = []
+        if campaign_id is not None:
+            sql += ' AND campaign_id = ?'
+            args.append(campaign_id)
+        if adgroup_id is not None:
+            sql += ' AND adgroup_id = ?'
+            args.append(adgroup_id)
+        if not include_deleted:
+            sql += ' AND deleted = 0'
+        return [json.loads(row[0]) for row in self._db.execute(sql, args)]
+
+    def campaigns(self, include_deleted=False):
+        return self.query('campaigns', include_deleted=include_deleted)
+
+    def adgroups(self, campaign_id=None, include_deleted=False):
+        return self.query('adgroups', campaign_id, include_deleted=include_deleted)
+
+    def targeting_keywords(self, campaign_id=None, adgroup_id=None, include_deleted=False):
+        return self.query('targeting_keywords', campaign_id, adgroup_id, include_deleted)
+
+    def negative_keywords(self, campaign_id=None, include_deleted=False):
+        return self.query('negative_keywords', campaign_id, include_deleted=include_deleted)
+
+    def adgroup_negative_keywords(self, campaign_id=None, adgroup_id=None, include_deleted=False):
+        return self.query('adgroup_negative_keywords', campaign_id, adgroup_id, include_deleted)
+
+    def adgroup_creativesets(self, campaign_id=None, adgroup_id=None, include_deleted=False):
+        return self.query('adgroup_creativesets', campaign_id, adgroup_id, include_deleted)
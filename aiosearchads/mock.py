@@ -0,0 +1,421 @@
+'''Local stand-in for the Search Ads api
+'''
+import sys
+import json
+import zlib
+import random
+import asyncio
+import argparse
+import datetime
+from aiohttp import web
+
+MODIFIED = '2020-04-08T21:03:58.834'
+
+
+def _money(amount):
+    return {'amount': '%.2f' % amount, 'currency': 'USD'}
+
+
+def _page(entities, offset, limit):
+    offset, limit = int(offset), int(limit)
+    return {'data': entities[offset:offset + limit],
+            'pagination': {'totalResults': len(entities), 'startIndex': offset,
+                           'itemsPerPage': min(limit, max(len(entities) - offset, 0))},
+            'error': None}
+
+
+def _matches(entity, conditions):
+    for condition in conditions or []:
+        value = entity.get(condition.get('field'))
+        values = condition.get('values') or []
+        operator = condition.get('operator')
+        if operator in ('EQUALS', 'IN') and str(value).lower() not in [str(v).lower() for v in values]:
+            return False
+        if operator == 'GREATER_THAN' and not (value is not None and str(value) > str(values[0])):
+            return False
+        if operator == 'LESS_THAN' and not (value is not None and str(value) < str(values[0])):
+            return False
+    return True
+
+
+def _error(status, code, message):
+    return web.json_response(
+        {'data': None, 'pagination': None,
+         'error': {'errors': [{'messageCode': code, 'message': message, 'field': ''}]}},
+        status=status)
+
+
+class MockSearchAds:
+    '''aiohttp server answering the endpoints AioSearchAds calls from
+    synthetic campaigns, ad groups, keywords and reports.
+    latency: seconds added to every response, jitter: random extra up to it.
+    error_rate/throttle_rate: share of api calls answered 500 / 429.
+    retry_after: Retry-After seconds sent with a 429.
+    requests counts api calls per status.
+    '''
+
+    def __init__(self, campaigns=3, adgroups=5, keywords=200, latency=0.0, jitter=0.0,
+                 error_rate=0.0, throttle_rate=0.0, retry_after=1, token_ttl=3600, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.token_ttl = token_ttl
+        self.random = random.Random(seed)
+        self.requests = {}
+        self.tokens = set()
+        self._next_id = 1000000
+        self._runner = None
+        self.url = None
+        self.campaigns = {}
+        self.adgroups = {}
+        self.keywords = {}
+        self.negative_keywords = {}
+        self.adgroup_negative_keywords = {}
+        for _ in range(campaigns):
+            campaign_id = self._id()
+            self.campaigns[campaign_id] = {
+                'id': campaign_id, 'orgId': 1, 'name': 'campaign %s' % campaign_id,
+                'adamId': 900000000, 'budgetAmount': _money(10000), 'dailyBudgetAmount': _money(500),
+                'status': 'ENABLED', 'servingStatus': 'RUNNING', 'servingStateReasons': None,
+                'countriesOrRegions': ['US'], 'modificationTime': MODIFIED, 'deleted': False}
+            self.negative_keywords[campaign_id] = {}
+            for _ in range(adgroups):
+                adgroup_id = self._id()
+                self.adgroups[adgroup_id] = {
+                    'id': adgroup_id, 'campaignId': campaign_id, 'orgId': 1,
+                    'name': 'ad group %s' % adgroup_id, 'defaultBidAmount': _money(1),
+                    'cpaGoal': _money(2), 'automatedKeywordsOptIn': False, 'pricingModel': 'CPC',
+                    'status': 'ENABLED', 'servingStatus': 'RUNNING', 'targetingDimensions': {},
+                    'modificationTime': MODIFIED, 'deleted': False}
+                self.adgroup_negative_keywords[adgroup_id] = {}
+                for i in range(keywords):
+                    keyword_id = self._id()
+                    self.keywords[keyword_id] = {
+                        'id': keyword_id, 'campaignId': campaign_id, 'adGroupId': adgroup_id,
+                        'text': 'keyword %s' % keyword_id, 'matchType': 'EXACT' if i % 2 else 'BROAD',
+                        'status': 'ACTIVE', 'bidAmount': _money(1 + i % 5 / 4),
+                        'modificationTime': MODIFIED, 'deleted': False}
+
+    def _id(self):
+        self._next_id += 1
+        return self._next_id
+
+    def app(self):
+        app = web.Application(middlewares=[self._middleware], client_max_size=64 * 1024 ** 2)
+        route = app.router.add_route
+        route('POST', '/auth/oauth2/token', self.token)
+        route('GET', '/mock/stats', self.stats)
+        route('GET', '/api/{version}/acls', self.acls)
+        route('GET', '/api/{version}/campaigns', self.all_campaigns)
+        route('POST', '/api/{version}/campaigns/find', self.find_campaigns)
+        route('GET', '/api/{version}/campaigns/{campaign_id}', self.get_campaign)
+        route('PUT', '/api/{version}/campaigns/{campaign_id}', self.update_campaign)
+        route('GET', '/api/{version}/campaigns/{campaign_id}/adgroups', self.all_adgroups)
+        route('POST', '/api/{version}/campaigns/{campaign_id}/adgroups/find', self.find_adgroups)
+        route('GET', '/api/{version}/campaigns/{campaign_id}/adgroups/{adgroup_id:\\d+}', self.get_adgroup)
+        route('POST', '/api/{version}/campaigns/{campaign_id}/adgroups/targetingkeywords/find',
+              self.find_keywords)
+        route('GET', '/api/{version}/campaigns/{campaign_id}/adgroups/{adgroup_id:\\d+}/targetingkeywords',
+              self.all_keywords)
+        route('POST', '/api/{version}/campaigns/{campaign_id}/adgroups/{adgroup_id:\\d+}/targetingkeywords/bulk',
+              self.create_keywords)
+        route('PUT', '/api/{version}/campaigns/{campaign_id}/adgroups/{adgroup_id:\\d+}/targetingkeywords/bulk',
+              self.update_keywords)
+        route('GET', '/api/{version}/campaigns/{campaign_id}/negativekeywords', self.all_negative_keywords)
+        route('POST', '/api/{version}/campaigns/{campaign_id}/negativekeywords/find', self.find_negative_keywords)
+        route('POST', '/api/{version}/campaigns/{campaign_id}/adgroups/negativekeywords/find',
+              self.find_adgroup_negative_keywords)
+        route('POST', '/api/{version}/campaigns/{campaign_id}/adgroupcreativesets/find', self.find_creativesets)
+        route('POST', '/api/{version}/reports/campaigns', self.campaign_report)
+        route('POST', '/api/{version}/reports/campaigns/{campaign_id}/{level}', self.report)
+        return app
+
+    async def start(self, host='127.0.0.1', port=0):
+        '''Serve on host:port (a free port by default) and return the base url.
+        use AioSearchAds(api_url=url + '/api', token_url=url + '/auth/oauth2/token').
+        '''
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = 'http://%s:%s' % (host, port)
+        return self.url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    @web.middleware
+    async def _middleware(self, request, handler):
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + self.random.random() * self.jitter)
+        if request.path.startswith('/api/'):
+            response = self._inject(request)
+            if response is None:
+                response = await handler(request)
+            self.requests[response.status] = self.requests.get(response.status, 0) + 1
+            return response
+        return await handler(request)
+
+    def _inject(self, request):
+        auth = request.headers.get('Authorization', '')
+        if self.tokens and auth[len('Bearer '):] not in self.tokens:
+            return _error(401, 'UNAUTHORIZED', 'Invalid token')
+        draw = self.random.random()
+        if draw < self.throttle_rate:
+            response = _error(429, 'TOO_MANY_REQUESTS', 'Rate limit exceeded')
+            response.headers['Retry-After'] = str(self.retry_after)
+            return response
+        if draw < self.throttle_rate + self.error_rate:
+            return _error(500, 'INTERNAL_ERROR', 'Injected error')
+        return None
+
+    async def stats(self, request):
+        return web.json_response({'requests': self.requests, 'tokens': len(self.tokens)})
+
+    async def token(self, request):
+        token = 'mock-%s' % self._id()
+        self.tokens.add(token)
+        return web.json_response({'access_token': token, 'token_type': 'Bearer',
+                                  'expires_in': self.token_ttl, 'scope': 'searchadsorg'})
+
+    async def _selector(self, request):
+        body = json.loads(await request.read() or b'{}')
+        pagination = body.get('pagination') or {}
+        return body, pagination.get('offset', 0), pagination.get('limit', 1000)
+
+    async def acls(self, request):
+        return web.json_response({'data': [{'orgId': 1, 'orgName': 'mock', 'currency': 'USD',
+                                            'paymentModel': 'LOC', 'roleNames': ['Admin']}],
+                                  'pagination': None, 'error': None})
+
+    async def all_campaigns(self, request):
+        query = request.query
+        return web.json_response(_page(list(self.campaigns.values()),
+                                       query.get('offset', 0), query.get('limit', 1000)))
+
+    async def find_campaigns(self, request):
+        body, offset, limit = await self._selector(request)
+        entities = [c for c in self.campaigns.values() if _matches(c, body.get('conditions'))]
+        return web.json_response(_page(entities, offset, limit))
+
+    async def get_campaign(self, request):
+        campaign = self.campaigns.get(int(request.match_info['campaign_id']))
+        if campaign is None:
+            return _error(404, 'NOT_FOUND', 'Campaign not found')
+        return web.json_response({'data': campaign, 'pagination': None, 'error': None})
+
+    async def update_campaign(self, request):
+        campaign = self.campaigns.get(int(request.match_info['campaign_id']))
+        if campaign is None:
+            return _error(404, 'NOT_FOUND', 'Campaign not found')
+        campaign.update(json.loads(await request.read()).get('campaign') or {})
+        return web.json_response({'data': campaign, 'pagination': None, 'error': None})
+
+    def _adgroups(self, request):
+        campaign_id = int(request.match_info['campaign_id'])
+        return [a for a in self.adgroups.values() if a['campaignId'] == campaign_id]
+
+    async def all_adgroups(self, request):
+        query = request.query
+        return web.json_response(_page(self._adgroups(request),
+                                       query.get('offset', 0), query.get('limit', 1000)))
+
+    async def find_adgroups(self, request):
+        body, offset, limit = await self._selector(request)
+        entities = [a for a in self._adgroups(request) if _matches(a, body.get('conditions'))]
+        return web.json_response(_page(entities, offset, limit))
+
+    async def get_adgroup(self, request):
+        adgroup = self.adgroups.get(int(request.match_info['adgroup_id']))
+        if adgroup is None:
+            return _error(404, 'NOT_FOUND', 'Ad group not found')
+        return web.json_response({'data': adgroup, 'pagination': None, 'error': None})
+
+    async def find_keywords(self, request):
+        body, offset, limit = await self._selector(request)
+        campaign_id = int(request.match_info['campaign_id'])
+        entities = [k for k in self.keywords.values()
+                    if k['campaignId'] == campaign_id and _matches(k, body.get('conditions'))]
+        return web.json_response(_page(entities, offset, limit))
+
+    async def all_keywords(self, request):
+        adgroup_id = int(request.match_info['adgroup_id'])
+        query = request.query
+        entities = [k for k in self.keywords.values() if k['adGroupId'] == adgroup_id]
+        return web.json_response(_page(entities, query.get('offset', 0), query.get('limit', 1000)))
+
+    async def create_keywords(self, request):
+        campaign_id = int(request.match_info['campaign_id'])
+        adgroup_id = int(request.match_info['adgroup_id'])
+        created, errors = [], []
+        for i, item in enumerate(json.loads(await request.read())):
+            if not item.get('text'):
+                errors.append({'messageCode': 'INVALID_INPUT', 'message': 'text is required',
+                               'field': 'KeywordImport[%d].text' % i})
+                continue
+            keyword = {'id': self._id(), 'campaignId': campaign_id, 'adGroupId': adgroup_id,
+                       'status': 'ACTIVE', 'matchType': 'BROAD', 'modificationTime': MODIFIED,
+                       'deleted': False, **item}
+            self.keywords[keyword['id']] = keyword
+            created.append(keyword)
+        return web.json_response({'data': created, 'pagination': None,
+                                  'error': {'errors': errors} if errors else None})
+
+    async def update_keywords(self, request):
+        updated, errors = [], []
+        for i, item in enumerate(json.loads(await request.read())):
+            keyword = self.keywords.get(int(item.get('id') or 0))
+            if keyword is None:
+                errors.append({'messageCode': 'NOT_FOUND', 'message': 'Keyword not found',
+                               'field': 'KeywordUpdateRequest[%d].id' % i})
+                continue
+            keyword.update(item, id=keyword['id'])
+            updated.append(keyword)
+        return web.json_response({'data': updated, 'pagination': None,
+                                  'error': {'errors': errors} if errors else None})
+
+    async def all_negative_keywords(self, request):
+        query = request.query
+        entities = list(self.negative_keywords.get(int(request.match_info['campaign_id']), {}).values())
+        return web.json_response(_page(entities, query.get('offset', 0), query.get('limit', 1000)))
+
+    async def find_negative_keywords(self, request):
+        body, offset, limit = await self._selector(request)
+        entities = [k for k in self.negative_keywords.get(int(request.match_info['campaign_id']), {}).values()
+                    if _matches(k, body.get('conditions'))]
+        return web.json_response(_page(entities, offset, limit))
+
+    async def find_adgroup_negative_keywords(self, request):
+        body, offset, limit = await self._selector(request)
+        entities = [k for a in self._adgroups(request)
+                    for k in self.adgroup_negative_keywords[a['id']].values()
+                    if _matches(k, body.get('conditions'))]
+        return web.json_response(_page(entities, offset, limit))
+
+    async def find_creativesets(self, request):
+        body, offset, limit = await self._selector(request)
+        return web.json_response(_page([], offset, limit))
+
+    def _metrics(self, seed, date=None):
+        draw = zlib.crc32(repr(seed).encode('utf-8'))
+        impressions = draw % 5001
+        taps = (draw >> 4) % (impressions // 10 + 2)
+        installs = (draw >> 8) % (taps + 1)
+        spend = taps * (0.1 + (draw >> 12) % 290 / 100)
+        metrics = {
+            'impressions': impressions, 'taps': taps, 'installs': installs,
+            'newDownloads': installs, 'redownloads': 0, 'latOnInstalls': 0, 'latOffInstalls': installs,
+            'ttr': round(taps / impressions, 4) if impressions else 0.0,
+            'conversionRate': round(installs / taps, 4) if taps else 0.0,
+            'avgCPA': _money(spend / installs if installs else 0),
+            'avgCPT': _money(spend / taps if taps else 0),
+            'avgCPM': _money(spend * 1000 / impressions if impressions else 0),
+            'localSpend': _money(spend)}
+        if date is not None:
+            metrics['date'] = date
+        return metrics
+
+    def _report_response(self, body, entities):
+        body = body or {}
+        start = datetime.datetime.strptime(body.get('startTime', '2020-04-08'), '%Y-%m-%d').date()
+        end = datetime.datetime.strptime(body.get('endTime', '2020-04-08'), '%Y-%m-%d').date()
+        dates = [(start + datetime.timedelta(days=d)).isoformat() for d in range((end - start).days + 1)]
+        pagination = (body.get('selector') or {}).get('pagination') or {}
+        offset, limit = int(pagination.get('offset', 0)), int(pagination.get('limit', 1000))
+        rows = []
+        for metadata in entities[offset:offset + limit]:
+            key = next(v for k, v in metadata.items() if k.endswith('Id'))
+            row = {'other': False, 'metadata': metadata}
+            if body.get('granularity'):
+                row['granularity'] = [self._metrics((key, date), date) for date in dates]
+            if body.get('returnRowTotals') or not body.get('granularity'):
+                row['total'] = self._metrics((key, tuple(dates)))
+            rows.append(row)
+        response = {'row': rows}
+        if body.get('returnGrandTotals'):
+            response['grandTotals'] = {'other': False, 'total': self._metrics(('grand', tuple(dates)))}
+        return web.json_response({
+            'data': {'reportingDataResponse': response},
+            'pagination': {'totalResults': len(entities), 'startIndex': offset, 'itemsPerPage': len(rows)},
+            'error': None})
+
+    async def campaign_report(self, request):
+        body = json.loads(await request.read() or b'{}')
+        entities = [{'campaignId': c['id'], 'campaignName': c['name'], 'campaignStatus': c['status'],
+                     'deleted': c['deleted']} for c in self.campaigns.values()]
+        return self._report_response(body, entities)
+
+    def _bid(self, keyword):
+        # a keyword created without a bid uses its ad group's default bid
+        if keyword.get('bidAmount'):
+            return keyword['bidAmount']
+        adgroup = self.adgroups.get(keyword['adGroupId'])
+        return adgroup and adgroup.get('defaultBidAmount')
+
+    async def report(self, request):
+        body = json.loads(await request.read() or b'{}')
+        campaign_id = int(request.match_info['campaign_id'])
+        level = request.match_info['level']
+        if level == 'adgroups':
+            entities = [{'adGroupId': a['id'], 'campaignId': campaign_id, 'adGroupName': a['name'],
+                         'deleted': a['deleted']} for a in self._adgroups(request)]
+        elif level in ('keywords', 'searchterms'):
+            entities = [{'keywordId': k['id'], 'adGroupId': k['adGroupId'], 'keyword': k['text'],
+                         'matchType': k['matchType'], 'bidAmount': self._bid(k), 'deleted': k['deleted']}
+                        for k in self.keywords.values() if k['campaignId'] == campaign_id]
+            if level == 'searchterms':
+                for entity in entities:
+                    entity['searchTermText'] = 'search %s' % entity['keywordId']
+        elif level == 'creativesets':
+            entities = []
+        else:
+            return _error(404, 'NOT_FOUND', 'Unknown report')
+        return self._report_response(body, entities)
+
+
+async def serve(host='127.0.0.1', port=8080, **kwargs):
+    '''Run a MockSearchAds until cancelled.
+    '''
+    mock = MockSearchAds(**kwargs)
+    url = await mock.start(host, port)
+    print('mock Search Ads api on %s' % url, flush=True)
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await mock.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Local stand-in for the Search Ads api.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--campaigns', type=int, default=3)
+    parser.add_argument('--adgroups', type=int, default=5)
+    parser.add_argument('--keywords', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--retry-after', type=float, default=1)
+    args = vars(parser.parse_args(argv))
+    try:
+        asyncio.get_event_loop().run_until_complete(serve(**args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,171 @@
+'''Typed entity models
+'''
+import sys
+import decimal
+from collections import namedtuple
+
+Money = namedtuple('Money', 'amount currency')
+
+_INTERNED = frozenset(('status', 'servingStatus', 'displayStatus', 'matchType',
+                       'pricingModel', 'paymentModel', 'adChannelType', 'billingEvent'))
+
+
+def _money(value):
+    if value is None:
+        return None
+    return Money(decimal.Decimal(value[0]), value[1])
+
+
+def _tuple(value):
+    return None if value is None else tuple(value)
+
+
+class Entity:
+    '''Base of the compact entity models.
+    FIELDS are kept in slots (enum-like strings interned), MONEY fields are
+    stored as (amount, currency) and decoded to Money on access, NESTED
+    fields keep the parsed JSON and LISTS are turned into tuples on access.
+    Keys the model does not know are kept in `extra`. to_dict(), item access
+    (entity['bidAmount']['amount']) and get() give the raw JSON form, so code
+    written against dicts keeps working; attributes give the decoded types.
+    '''
+    __slots__ = ('extra',)
+    FIELDS = ()
+    MONEY = ()
+    NESTED = ()
+    LISTS = ()
+
+    def __init__(self, data):
+        known = self._known
+        self.extra = {k: v for k, v in data.items() if k not in known} or None
+        setter = object.__setattr__
+        get = data.get
+        for key in self.FIELDS:
+            value = get(key)
+            if value is not None and key in _INTERNED:
+                value = sys.intern(value)
+            setter(self, key, value)
+        for key in self.MONEY:
+            value = get(key)
+            setter(self, '_' + key, None if value is None else
+                   (value['amount'], sys.intern(value['currency'])))
+        for key in self._raw:
+            setter(self, '_' + key, get(key))
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._raw = cls.NESTED + cls.LISTS
+        cls._known = frozenset(cls.FIELDS + cls.MONEY + cls._raw)
+        for key in cls.MONEY:
+            setattr(cls, key, property(lambda self, slot='_' + key: _money(getattr(self, slot))))
+        for key in cls.NESTED:
+            setattr(cls, key, property(lambda self, slot='_' + key: getattr(self, slot)))
+        for key in cls.LISTS:
+            setattr(cls, key, property(lambda self, slot='_' + key: _tuple(getattr(self, slot))))
+
+    def to_dict(self):
+        '''The entity as the API returned it, without null fields.
+        '''
+        data = {}
+        for key in self.FIELDS:
+            value = getattr(self, key)
+            if value is not None:
+                data[key] = value
+        for key in self.MONEY:
+            value = getattr(self, '_' + key)
+            if value is not None:
+                data[key] = {'amount': value[0], 'currency': value[1]}
+        for key in self._raw:
+            value = getattr(self, '_' + key)
+            if value is not None:
+                data[key] = value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def _raw_value(self, key):
+        if key in self.MONEY:
+            value = getattr(self, '_' + key)
+            return None if value is None else {'amount': value[0], 'currency': value[1]}
+        if key in self._raw:
+            return getattr(self, '_' + key)
+        if key in self._known:
+            return getattr(self, key)
+        return (self.extra or {}).get(key)
+
+    def __getitem__(self, key):
+        value = self._raw_value(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        value = self._raw_value(key)
+        return default if value is None else value
+
+    def __contains__(self, key):
+        return self._raw_value(key) is not None
+
+    def __repr__(self):
+        return '%s(id=%r)' % (type(self).__name__, getattr(self, 'id', None))
+
+
+def _slots(fields, money=(), nested=(), lists=()):
+    return tuple(fields) + tuple('_' + key for key in tuple(money) + tuple(nested) + tuple(lists))
+
+
+class Campaign(Entity):
+    FIELDS = ('id', 'orgId', 'name', 'adamId', 'paymentModel', 'startTime', 'endTime',
+              'status', 'servingStatus', 'displayStatus', 'creationTime',
+              'modificationTime', 'deleted', 'adChannelType', 'billingEvent',
+              'sapinLawResponse')
+    MONEY = ('budgetAmount', 'dailyBudgetAmount')
+    NESTED = ('locInvoiceDetails', 'countryOrRegionServingStateReasons')
+    LISTS = ('servingStateReasons', 'countriesOrRegions', 'budgetOrders', 'supplySources')
+    __slots__ = _slots(FIELDS, MONEY, NESTED, LISTS)
+
+
+class AdGroup(Entity):
+    FIELDS = ('id', 'campaignId', 'orgId', 'name', 'startTime', 'endTime',
+              'automatedKeywordsOptIn', 'pricingModel', 'status', 'servingStatus',
+              'displayStatus', 'creationTime', 'modificationTime', 'deleted')
+    MONEY = ('cpaGoal', 'defaultBidAmount')
+    NESTED = ('targetingDimensions',)
+    LISTS = ('servingStateReasons',)
+    __slots__ = _slots(FIELDS, MONEY, NESTED, LISTS)
+
+
+class TargetingKeyword(Entity):
+    FIELDS = ('id', 'campaignId', 'adGroupId', 'text', 'status', 'matchType',
+              'creationTime', 'modificationTime', 'deleted')
+    MONEY = ('bidAmount',)
+    __slots__ = _slots(FIELDS, MONEY)
+
+
+class NegativeKeyword(Entity):
+    FIELDS = ('id', 'campaignId', 'adGroupId', 'text', 'status', 'matchType',
+              'creationTime', 'modificationTime', 'deleted')
+    __slots__ = _slots(FIELDS)
+
+
+class CreativeSet(Entity):
+    FIELDS = ('id', 'orgId', 'adamId', 'name', 'languageCode', 'status',
+              'creationTime', 'modificationTime', 'deleted')
+    NESTED = ('creativeSetAssets',)
+    LISTS = ('languages', 'servingStateReasons')
+    __slots__ = _slots(FIELDS, (), NESTED, LISTS)
+
+
+class AdGroupCreativeSet(Entity):
+    FIELDS = ('id', 'campaignId', 'adGroupId', 'creativeSetId', 'status',
+              'servingStatus', 'creationTime', 'modificationTime', 'deleted')
+    LISTS = ('servingStateReasons',)
+    __slots__ = _slots(FIELDS, (), (), LISTS)
+
+
+def with_models(response, model):
+    '''Copy of a list response with `model` instances instead of entity dicts.
+    '''
+    if isinstance(response, dict) and isinstance(response.get('data'), list):
+        return {**response, 'data': [model(entity) for entity in response['data']]}
+    return response
@@ -0,0 +1,53 @@
+'''Async pagination
+'''
+import asyncio
+from collections import deque
+from .errors import SearchAdsError
+
+
+def page_entities(page):
+    '''The entity list of one page, raising on an error response.
+    '''
+    if not isinstance(page, dict) or page.get('error') or page.get('data') is None:
+        raise SearchAdsError(page)
+    return page['data']
+
+
+def total_results(page):
+    '''pagination.totalResults of a page, or the page length when absent.
+    '''
+    pagination = page.get('pagination') or {}
+    return pagination.get('totalResults', len(page['data']))
+
+
+async def paginate(fetch, limit=1000, window=4):
+    '''Yield every entity of a paged endpoint in order.
+    fetch(offset, limit) returns one page. The first page gives totalResults;
+    the remaining pages are fetched concurrently, at most `window` at a time.
+    '''
+    first = await fetch(0, limit)
+    for entity in page_entities(first):
+        yield entity
+    offsets = iter(range(limit, total_results(first), limit))
+    pending = deque()
+    for offset in offsets:
+        pending.append(asyncio.ensure_future(fetch(offset, limit)))
+        if len(pending) >= window:
+            break
+    try:
+        while pending:
+            page = await pending.popleft()
+            offset = next(offsets, None)
+            if offset is not None:
+                pending.append(asyncio.ensure_future(fetch(offset, limit)))
+            for entity in page_entities(page):
+                yield entity
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def with_pagination(data, offset, limit):
+    '''Copy of a selector with its pagination replaced.
+    '''
+    return {**data, 'pagination': {'offset': offset, 'limit': limit}}
@@ -0,0 +1,224 @@
+'''Report pagination
+'''
+import asyncio
+import decimal
+import datetime
+from .errors import SearchAdsError
+
+
+def reporting_data(page):
+    '''data.reportingDataResponse of a report page, raising on an error response.
+    '''
+    if not isinstance(page, dict) or page.get('error') or not page.get('data'):
+        raise SearchAdsError(page)
+    return page['data'].get('reportingDataResponse') or {}
+
+
+def with_report_pagination(data, offset, limit):
+    '''Copy of a report request with selector.pagination replaced.
+    '''
+    selector = {**data.get('selector', {}),
+                'pagination': {'offset': offset, 'limit': limit}}
+    return {**data, 'selector': selector}
+
+
+def decode_report(codec, raw, transform=None, aggregate=None):
+    '''Decode a report page from raw bytes and reshape its rows.
+    Runs as is in a thread or process pool: transform(row) replaces each row
+    and aggregate(rows) the row list, e.g. ReportColumns.from_rows for a
+    compact columnar page. Other bodies are returned decoded and unchanged.
+    '''
+    if not raw.strip():
+        return None
+    page = codec.loads(raw)
+    data = page.get('data') if isinstance(page, dict) else None
+    response = data.get('reportingDataResponse') if isinstance(data, dict) else None
+    if not response or (transform is None and aggregate is None):
+        return page
+    rows = response.get('row') or []
+    if transform is not None:
+        rows = [transform(row) for row in rows]
+    if aggregate is not None:
+        rows = aggregate(rows)
+    response['row'] = rows
+    return page
+
+
+class ReportStream:
+    '''Async iterator over every row of a report, one page in memory at a time.
+    fetch(data) returns one report page. With prefetch the next page is
+    requested while the rows of the current one are consumed.
+    grand_totals is set once the first page has arrived.
+    '''
+
+    def __init__(self, fetch, data, prefetch=True):
+        self.fetch = fetch
+        self.data = data
+        self.prefetch = prefetch
+        self.grand_totals = None
+        self.total_results = None
+
+    def __aiter__(self):
+        return self._rows()
+
+    async def _rows(self):
+        pagination = self.data.get('selector', {}).get('pagination') or {}
+        offset = pagination.get('offset', 0)
+        limit = pagination.get('limit', 1000)
+        pending = asyncio.ensure_future(
+            self.fetch(with_report_pagination(self.data, offset, limit)))
+        try:
+            while pending is not None:
+                page = await pending
+                pending = None
+                response = reporting_data(page)
+                if self.total_results is None:
+                    self.total_results = (page.get('pagination') or {}).get('totalResults', 0)
+                    self.grand_totals = response.get('grandTotals')
+                rows = response.get('row') or []
+                del page, response
+                offset += limit
+                more = bool(rows) and offset < self.total_results
+                if more and self.prefetch:
+                    pending = asyncio.ensure_future(
+                        self.fetch(with_report_pagination(self.data, offset, limit)))
+                for row in rows:
+                    yield row
+                if more and pending is None:
+                    pending = asyncio.ensure_future(
+                        self.fetch(with_report_pagination(self.data, offset, limit)))
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+
+def shard_date_range(start, end, shard='WEEK'):
+    '''Split an inclusive 'YYYY-MM-DD' range into (start, end) sub-ranges.
+    shard: 'DAY', 'WEEK', 'MONTH' or a number of days.
+    '''
+    start = datetime.datetime.strptime(start, '%Y-%m-%d').date()
+    end = datetime.datetime.strptime(end, '%Y-%m-%d').date()
+    shards = []
+    while start <= end:
+        if shard == 'MONTH':
+            following = (start.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+        elif shard == 'WEEK':
+            following = start + datetime.timedelta(days=7 - start.weekday())
+        else:
+            days = 1 if shard == 'DAY' else int(shard)
+            following = start + datetime.timedelta(days=days)
+        stop = min(following - datetime.timedelta(days=1), end)
+        shards.append((start.isoformat(), stop.isoformat()))
+        start = following
+    return shards
+
+
+def _metric_key(metadata, group_by):
+    return tuple(sorted(
+        (k, v) for k, v in metadata.items()
+        if k.endswith('Id') or k in group_by or k == 'searchTermText'))
+
+
+def _sum_metrics(target, metrics):
+    for key, value in metrics.items():
+        if key == 'localSpend':
+            spend = target.get(key)
+            amount = decimal.Decimal(value['amount'])
+            if spend is not None:
+                amount += decimal.Decimal(spend['amount'])
+            target[key] = {'amount': str(amount), 'currency': value['currency']}
+        elif isinstance(value, int) and not isinstance(value, bool):
+            target[key] = target.get(key, 0) + value
+        elif key not in target:
+            target[key] = value
+    return target
+
+
+def _derive_metrics(metrics):
+    '''Recompute ratio metrics from summed counts and spend.
+    '''
+    impressions = metrics.get('impressions', 0)
+    taps = metrics.get('taps', 0)
+    installs = metrics.get('installs', 0)
+    if 'ttr' in metrics:
+        metrics['ttr'] = round(taps / impressions, 4) if impressions else 0.0
+    if 'conversionRate' in metrics:
+        metrics['conversionRate'] = round(installs / taps, 4) if taps else 0.0
+    spend = metrics.get('localSpend')
+    if spend is not None:
+        amount = decimal.Decimal(spend['amount'])
+        cent = decimal.Decimal('0.01')
+        for key, count, scale in (('avgCPA', installs, 1), ('avgCPT', taps, 1),
+                                  ('avgCPM', impressions, 1000)):
+            if key in metrics:
+                value = (amount * scale / count).quantize(cent) if count else cent * 0
+                metrics[key] = {'amount': str(value), 'currency': spend['currency']}
+    return metrics
+
+
+def merge_report_rows(shards, group_by=(), row_totals=True):
+    '''Merge the rows of date-range shards into one row per entity.
+    granularity entries are concatenated (summed when a date repeats) and
+    row totals are recomputed from them or from the shard totals.
+    '''
+    merged = {}
+    for rows in shards:
+        for row in rows:
+            key = _metric_key(row.get('metadata', {}), group_by)
+            target = merged.get(key)
+            if target is None:
+                target = merged[key] = {'other': row.get('other', False),
+                                        'metadata': row.get('metadata', {}),
+                                        'total': {}}
+                if 'granularity' in row:
+                    target['granularity'] = {}
+            target['metadata'] = row.get('metadata', target['metadata'])
+            if 'granularity' in row:
+                for entry in row['granularity']:
+                    _sum_metrics(target['granularity'].setdefault(entry.get('date'), {}), entry)
+                    _sum_metrics(target['total'], {k: v for k, v in entry.items() if k != 'date'})
+            else:
+                _sum_metrics(target['total'], row.get('total', {}))
+    result = []
+    for target in merged.values():
+        if 'granularity' in target:
+            target['granularity'] = [_derive_metrics(target['granularity'][date])
+                                     for date in sorted(target['granularity'])]
+        _derive_metrics(target['total'])
+        result.append(target)
+    total = {}
+    for target in result:
+        _sum_metrics(total, target['total'])
+    grand_totals = {'other': False, 'total': _derive_metrics(total)}
+    if not row_totals:
+        for target in result:
+            if 'granularity' in target:
+                del target['total']
+    return result, grand_totals
+
+
+async def sharded_report(fetch, data, shard='WEEK', concurrency=4):
+    '''Fetch a report as concurrent date-range shards and merge them.
+    fetch(data) returns one report page. The result has the shape of a
+    single response, with returnRowTotals/returnGrandTotals computed locally.
+    '''
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def collect(start, end):
+        request = {**data, 'startTime': start, 'endTime': end,
+                   'returnRowTotals': True, 'returnGrandTotals': False}
+        async with semaphore:
+            return [row async for row in ReportStream(fetch, request, prefetch=False)]
+
+    shards = await asyncio.gather(*[
+        collect(start, end)
+        for start, end in shard_date_range(data['startTime'], data['endTime'], shard)])
+    rows, grand_totals = merge_report_rows(
+        shards, data.get('groupBy') or (), data.get('returnRowTotals', False))
+    response = {'row': rows}
+    if data.get('returnGrandTotals'):
+        response['grandTotals'] = grand_totals
+    return {'data': {'reportingDataResponse': response},
+            'pagination': {'totalResults': len(rows), 'startIndex': 0,
+                           'itemsPerPage': len(rows)},
+            'error': None}
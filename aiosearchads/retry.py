@@ -0,0 +1,86 @@
+'''Retry policy
+'''
+import time
+import random
+import asyncio
+from .transport import TRANSPORT_ERRORS
+
+
+def is_read_only(method, resource):
+    '''GETs and the read-only POSTs (`*/find` and `reports/*`).
+    '''
+    if method == 'GET':
+        return True
+    return method == 'POST' and (resource.endswith('/find') or resource.startswith('reports/'))
+
+
+class RetryPolicy:
+    '''Retries read-only calls with exponential backoff and full jitter.
+    max_attempts: attempts per call, including the first one.
+    backoff/max_backoff: base and cap, in seconds, of the delay before a retry.
+    deadline: seconds after which no further attempt is started.
+    statuses: response statuses that are retried, besides connection errors and timeouts.
+    retry_mutations: also retry create_*/update_*/delete_* calls.
+    hedge_after: send a second copy of a GET still pending after this many
+    seconds and keep whichever answers first; None disables hedging.
+    '''
+
+    def __init__(self, max_attempts=3, backoff=0.5, max_backoff=10, deadline=60,
+                 statuses=(500, 502, 503, 504), retry_mutations=False, hedge_after=None):
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.deadline = deadline
+        self.statuses = statuses
+        self.retry_mutations = retry_mutations
+        self.hedge_after = hedge_after
+
+    def delay(self, attempt):
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    async def run(self, method, resource, send):
+        '''Run send() -> (status, headers, data), retrying when allowed.
+        '''
+        if not (self.retry_mutations or is_read_only(method, resource)):
+            return await send()
+        hedge = self.hedge_after is not None and method == 'GET'
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            try:
+                if hedge:
+                    response = await self._hedged(send)
+                else:
+                    response = await send()
+                if response[0] not in self.statuses:
+                    return response
+                error = None
+            except TRANSPORT_ERRORS as e:
+                error = e
+            attempt += 1
+            delay = self.delay(attempt - 1)
+            if attempt >= self.max_attempts or time.monotonic() - started + delay > self.deadline:
+                if error is not None:
+                    raise error
+                return response
+            await asyncio.sleep(delay)
+
+    async def _hedged(self, send):
+        first = asyncio.ensure_future(send())
+        done, _ = await asyncio.wait([first], timeout=self.hedge_after)
+        if done:
+            return first.result()
+        second = asyncio.ensure_future(send())
+        tasks = [first, second]
+        try:
+            while tasks:
+                done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                tasks = list(pending)
+            return first.result()
+        finally:
+            for task in (first, second):
+                if not task.done():
+                    task.cancel()
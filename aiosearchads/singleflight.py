@@ -0,0 +1,40 @@
+'''Request coalescing
+'''
+import json
+import asyncio
+import hashlib
+import functools
+
+
+def request_key(org_id, method, resource, kwargs):
+    '''Identity of a call: org context, method, resource, params, body and headers.
+    '''
+    body = json.dumps(kwargs.get('json'), sort_keys=True, default=str)
+    return (org_id, method, resource,
+            json.dumps(sorted((kwargs.get('params') or {}).items()), default=str),
+            hashlib.sha1(body.encode('utf-8')).hexdigest(),
+            json.dumps(kwargs.get('headers'), sort_keys=True, default=str))
+
+
+class SingleFlight:
+    '''Lets identical concurrent calls share one in-flight request and result.
+    '''
+
+    def __init__(self):
+        self._calls = {}
+
+    def __len__(self):
+        return len(self._calls)
+
+    async def run(self, key, factory):
+        '''Await factory() once for every caller that arrives while it runs.
+        '''
+        future = self._calls.get(key)
+        if future is None:
+            future = self._calls[key] = asyncio.ensure_future(factory())
+            future.add_done_callback(functools.partial(self._forget, key))
+        return await asyncio.shield(future)
+
+    def _forget(self, key, future):
+        if self._calls.get(key) is future:
+            del self._calls[key]
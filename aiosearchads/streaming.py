@@ -0,0 +1,154 @@
+'''Incremental report parsing
+'''
+import re
+import json
+from .reports import reporting_data, with_report_pagination
+
+ROW_PATH = ('data', 'reportingDataResponse', 'row')
+
+# a complete string, or a lone quote when the string is cut by the chunk end
+_TOKEN = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[{}\[\]"]')
+# inside an element only brackets matter: skip strings and everything else in one match
+_SKIP = re.compile(rb'(?:"[^"\\]*(?:\\.[^"\\]*)*"|[^"{}\[\]]+)*')
+_QUOTE, _BRACE, _BRACKET = ord('"'), ord('{'), ord('[')
+_OPENERS = (_BRACE, _BRACKET)
+
+
+class RowSplitter:
+    '''Splits a JSON document fed in chunks into the raw bytes of each element
+    of the array at `path`, as soon as an element is complete. Only the
+    current element and the unscanned tail of the last chunk are buffered.
+    close() returns the rest of the document, with that array left empty.
+    '''
+
+    def __init__(self, path=ROW_PATH):
+        self.path = [json.dumps(key).encode('utf-8') for key in path]
+        self.buffer = bytearray()
+        self.skeleton = bytearray()
+        self.pos = 0
+        self.mark = 0
+        self.kinds = []
+        self.keys = []
+        self.last = None
+        self.depth = None
+        self.start = None
+        self.nested = 0
+
+    def feed(self, chunk):
+        '''Add a chunk and return the elements it completed, as bytes.
+        '''
+        buffer = self.buffer
+        buffer += chunk
+        rows = []
+        pos = self.pos
+        search = _TOKEN.search
+        skip = _SKIP.match
+        while True:
+            if self.start is not None:
+                pos = skip(buffer, pos).end()
+                if pos == len(buffer) or buffer[pos] == _QUOTE:
+                    break
+                if buffer[pos] in _OPENERS:
+                    self.nested += 1
+                else:
+                    self.nested -= 1
+                    if not self.nested:
+                        rows.append(bytes(buffer[self.start:pos + 1]))
+                        self.start = None
+                pos += 1
+                continue
+            match = search(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                break
+            start, end = match.span()
+            char = buffer[start]
+            if char == _QUOTE:
+                if end - start == 1:
+                    pos = start
+                    break
+                self.last = bytes(buffer[start:end])
+            elif char in _OPENERS:
+                if self.depth is not None and len(self.kinds) == self.depth:
+                    self.start = start
+                    self.nested = 1
+                else:
+                    self.keys.append(self.last if self.kinds and self.kinds[-1] == _BRACE else None)
+                    self.kinds.append(char)
+                    self.last = None
+                    if (char == _BRACKET and self.mark is not None
+                            and self.keys[1:] == self.path and self.kinds[0] == _BRACE):
+                        self.depth = len(self.kinds)
+                        self.skeleton += buffer[self.mark:end]
+                        self.mark = None
+            else:
+                if self.depth is not None and len(self.kinds) == self.depth:
+                    self.depth = None
+                    self.mark = start
+                if self.kinds:
+                    self.kinds.pop()
+                    self.keys.pop()
+            pos = end
+        if self.mark is not None:
+            self.skeleton += buffer[self.mark:pos]
+        base = pos if self.start is None else self.start
+        del buffer[:base]
+        self.pos = pos - base
+        if self.start is not None:
+            self.start = 0
+        if self.mark is not None:
+            self.mark = self.pos
+        return rows
+
+    def close(self):
+        '''The document without the streamed elements.
+        '''
+        if self.mark is not None:
+            self.skeleton += self.buffer[self.mark:]
+        self.buffer = bytearray()
+        return bytes(self.skeleton)
+
+
+class StreamingReport:
+    '''Async iterator over every row of a report, parsed incrementally while
+    each page downloads so peak memory follows one row, not one page.
+    Pages are fetched one after the other; grand_totals and total_results
+    are set once the first page has been read to the end.
+    transform(row) replaces each row as it is parsed.
+    '''
+
+    def __init__(self, client, resource, data, chunk_size=65536, transform=None):
+        self.client = client
+        self.resource = resource
+        self.data = data
+        self.chunk_size = chunk_size
+        self.transform = transform
+        self.grand_totals = None
+        self.total_results = None
+
+    def __aiter__(self):
+        return self._rows()
+
+    async def _rows(self):
+        loads = self.client.codec.loads
+        transform = self.transform
+        pagination = self.data.get('selector', {}).get('pagination') or {}
+        offset = pagination.get('offset', 0)
+        limit = pagination.get('limit', 1000)
+        while True:
+            splitter = RowSplitter()
+            count = 0
+            chunks = self.client.stream('post', self.resource, self.chunk_size,
+                                        json=with_report_pagination(self.data, offset, limit))
+            async for chunk in chunks:
+                for row in splitter.feed(chunk):
+                    count += 1
+                    yield loads(row) if transform is None else transform(loads(row))
+            page = loads(splitter.close())
+            response = reporting_data(page)
+            if self.total_results is None:
+                self.total_results = (page.get('pagination') or {}).get('totalResults', 0)
+                self.grand_totals = response.get('grandTotals')
+            offset += limit
+            if not count or offset >= self.total_results:
+                return
@@ -0,0 +1,203 @@
+'''Blocking client
+'''
+import os
+import asyncio
+import functools
+import threading
+import concurrent.futures
+
+
+class LoopThread:
+    '''One event loop running forever in a daemon thread.
+    Restarted transparently in a forked child, whose copy of the thread is gone.
+    '''
+
+    def __init__(self, name='aiosearchads'):
+        self.name = name
+        self.loop = None
+        self.thread = None
+        self.pid = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        '''Start the thread if needed; True when a new loop was started.
+        '''
+        with self._lock:
+            if self.loop is not None and self.pid == os.getpid():
+                return False
+            ready = threading.Event()
+            self.loop = asyncio.new_event_loop()
+            self.thread = threading.Thread(target=self._run, args=(self.loop, ready),
+                                           name=self.name, daemon=True)
+            self.thread.start()
+            ready.wait()
+            self.pid = os.getpid()
+            return True
+
+    @staticmethod
+    def _run(loop, ready):
+        asyncio.set_event_loop(loop)
+        loop.call_soon(ready.set)
+        loop.run_forever()
+
+    def run(self, coro, timeout=None):
+        '''Run a coroutine on the loop and block for its result.
+        On timeout the coroutine is cancelled, releasing what it holds.
+        '''
+        if self.thread is threading.current_thread():
+            coro.close()
+            raise RuntimeError('blocking call from inside the client event loop')
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def stop(self):
+        with self._lock:
+            if self.loop is None or self.pid != os.getpid():
+                self.loop = None
+                return
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.loop.close()
+            self.loop = None
+
+
+class BlockingIterator:
+    '''Blocking iterator over an async iterator living on the client loop,
+    such as the iter_* pages or a ReportStream; other attributes
+    (e.g. grand_totals) are read from the wrapped object.
+    '''
+
+    def __init__(self, runner, source, timeout=None):
+        self._runner = runner
+        self._source = source
+        self._iterator = None
+        self._timeout = timeout
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._iterator is None:
+            self._iterator = self._source.__aiter__()
+        try:
+            return self._runner.run(self._iterator.__anext__(), self._timeout)
+        except StopAsyncIteration:
+            raise StopIteration
+
+    def close(self):
+        '''Stop early, cancelling any page still being fetched.
+        '''
+        aclose = getattr(self._iterator, 'aclose', None)
+        self._iterator = None
+        if aclose is not None and self._runner.loop is not None:
+            self._runner.run(aclose(), self._timeout)
+
+    def __getattr__(self, name):
+        return getattr(self._source, name)
+
+
+class SyncSearchAds:
+    '''Thread-safe blocking facade over one AioSearchAds.
+    Every worker thread shares a single background event loop, pooled
+    session and access token. Endpoint methods block for their result,
+    iter_* methods return blocking iterators, and batch()/map() submit
+    many calls at once and wait for all of them.
+    client: the AioSearchAds to wrap; otherwise one is built from kwargs.
+    timeout: seconds each blocking call waits, None for no limit.
+    '''
+
+    def __init__(self, client=None, timeout=None, **kwargs):
+        if client is None:
+            from . import AioSearchAds
+            client = AioSearchAds(**kwargs)
+        self.client = client
+        self.timeout = timeout
+        self._runner = LoopThread()
+
+    def __enter__(self):
+        self._ensure()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _ensure(self):
+        if self._runner.start():
+            root = self.client._root
+            root._transport = None
+            root._token_refresh = None
+            self._runner.run(root.open(), self.timeout)
+        return self._runner
+
+    def run(self, coro, timeout=None):
+        '''Run any coroutine on the client loop and block for its result.
+        '''
+        return self._ensure().run(coro, self.timeout if timeout is None else timeout)
+
+    def _wrap(self, result):
+        from . import AioSearchAds
+        if hasattr(result, '__aiter__'):
+            return BlockingIterator(self._runner, result, self.timeout)
+        if not isinstance(result, AioSearchAds):
+            return result
+        view = object.__new__(self.__class__)
+        view.client = result
+        view.timeout = self.timeout
+        view._runner = self._runner
+        return view
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def blocking(*args, **kwargs):
+            return self._wrap(self.run(_invoke(attr, args, kwargs)))
+        return blocking
+
+    def batch(self, calls, concurrency=None, return_exceptions=False, timeout=None):
+        '''Run many calls concurrently and return their results in order.
+        calls: (method name, args) or (method name, args, kwargs) tuples.
+        concurrency: cap on calls in flight, None for all at once.
+        return_exceptions: return a failing call's exception instead of raising it.
+        '''
+        return self.run(_batch(self.client, calls, concurrency, return_exceptions), timeout)
+
+    def map(self, name, arguments, concurrency=None, return_exceptions=False, timeout=None, **kwargs):
+        '''batch() of one method over many argument tuples, sharing kwargs.
+        '''
+        calls = [(name, args if isinstance(args, tuple) else (args,), kwargs) for args in arguments]
+        return self.batch(calls, concurrency, return_exceptions, timeout)
+
+    def close(self):
+        '''Close the pooled session and stop the background loop.
+        '''
+        if self._runner.loop is not None and self._runner.pid == os.getpid():
+            self._runner.run(self.client.close(), self.timeout)
+        self._runner.stop()
+
+
+async def _invoke(method, args, kwargs):
+    result = method(*args, **kwargs)
+    if asyncio.iscoroutine(result) or isinstance(result, asyncio.Future):
+        result = await result
+    return result
+
+
+async def _batch(client, calls, concurrency, return_exceptions):
+    semaphore = asyncio.Semaphore(concurrency) if concurrency else None
+
+    async def one(call):
+        name, args = call[0], call[1]
+        kwargs = call[2] if len(call) > 2 else {}
+        if semaphore is None:
+            return await getattr(client, name)(*args, **kwargs)
+        async with semaphore:
+            return await getattr(client, name)(*args, **kwargs)
+
+    return await asyncio.gather(*[one(call) for call in calls], return_exceptions=return_exceptions)
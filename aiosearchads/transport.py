@@ -0,0 +1,238 @@
+'''HTTP transports
+'''
+import json
+import asyncio
+import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+from .columnar import _require
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# connection level failures of any transport, retried by RetryPolicy
+TRANSPORT_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError)
+if httpx is not None:
+    TRANSPORT_ERRORS += (httpx.TransportError,)
+
+
+class Transport:
+    '''What the client needs from an HTTP client.
+    request() is an async context manager yielding a response with `status`,
+    `headers`, `request_info` (an aiohttp.RequestInfo, for error messages),
+    `history`, `await read()` and `iter_chunked(size)`. trace is the metrics
+    Sample of the request, or None; transports may ignore it.
+    '''
+
+    closed = True
+
+    async def open(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+    def request(self, method, url, headers=None, params=None, data=None, trace=None, **kwargs):
+        raise NotImplementedError
+
+
+def request_info(method, url, headers=None):
+    '''aiohttp.RequestInfo of a request made by another HTTP client.
+    '''
+    url = URL(str(url))
+    return aiohttp.RequestInfo(url, method.upper(), CIMultiDictProxy(CIMultiDict(headers or {})), url)
+
+
+class AiohttpResponse:
+    __slots__ = ('response', 'status', 'headers', 'request_info', 'history')
+
+    def __init__(self, response):
+        self.response = response
+        self.status = response.status
+        self.headers = response.headers
+        self.request_info = response.request_info
+        self.history = response.history
+
+    async def read(self):
+        return await self.response.read()
+
+    def iter_chunked(self, size):
+        return self.response.content.iter_chunked(size)
+
+
+class _AiohttpRequest:
+    __slots__ = ('context',)
+
+    def __init__(self, context):
+        self.context = context
+
+    async def __aenter__(self):
+        return AiohttpResponse(await self.context.__aenter__())
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return await self.context.__aexit__(exc_type, exc, tb)
+
+
+class AiohttpTransport(Transport):
+    '''HTTP/1.1 over a pooled aiohttp session, the default.
+    One connection per request in flight, up to `limit`.
+    '''
+
+    def __init__(self, limit=100, limit_per_host=0, keepalive_timeout=30, ttl_dns_cache=300,
+                 trace_configs=None):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+        self.trace_configs = trace_configs
+        self.session = None
+
+    @property
+    def closed(self):
+        return self.session is None or self.session.closed
+
+    async def open(self):
+        if self.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.ttl_dns_cache
+            )
+            self.session = aiohttp.ClientSession(connector=connector, trace_configs=self.trace_configs)
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def request(self, method, url, headers=None, params=None, data=None, trace=None, **kwargs):
+        if trace is not None:
+            kwargs['trace_request_ctx'] = trace
+        return _AiohttpRequest(self.session.request(
+            method=method, url=url, headers=headers, params=params, data=data, **kwargs))
+
+
+class HttpxResponse:
+    __slots__ = ('response', 'status', 'headers', 'request_info', 'history')
+
+    def __init__(self, response):
+        self.response = response
+        self.status = response.status_code
+        self.headers = response.headers
+        request = response.request
+        self.request_info = request_info(request.method, request.url, request.headers)
+        self.history = ()
+
+    async def read(self):
+        return await self.response.aread()
+
+    def iter_chunked(self, size):
+        return self.response.aiter_bytes(size)
+
+
+class _HttpxRequest:
+    __slots__ = ('context',)
+
+    def __init__(self, context):
+        self.context = context
+
+    async def __aenter__(self):
+        return HttpxResponse(await self.context.__aenter__())
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return await self.context.__aexit__(exc_type, exc, tb)
+
+
+class HttpxTransport(Transport):
+    '''httpx AsyncClient, by default over HTTP/2 so many requests share a few
+    multiplexed connections; needs `pip install httpx[http2]`.
+    max_connections/keepalive: httpx pool limits; extra kwargs go to AsyncClient.
+    '''
+
+    def __init__(self, http2=True, max_connections=10, keepalive=10, timeout=60, **kwargs):
+        self.http2 = http2
+        self.max_connections = max_connections
+        self.keepalive = keepalive
+        self.timeout = timeout
+        self.kwargs = kwargs
+        self.client = None
+
+    @property
+    def closed(self):
+        return self.client is None or self.client.is_closed
+
+    async def open(self):
+        if self.closed:
+            module = _require(httpx, 'httpx[http2]')
+            limits = module.Limits(max_connections=self.max_connections,
+                                   max_keepalive_connections=self.keepalive)
+            self.client = module.AsyncClient(http2=self.http2, limits=limits,
+                                             timeout=self.timeout, **self.kwargs)
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    def request(self, method, url, headers=None, params=None, data=None, trace=None, **kwargs):
+        return _HttpxRequest(self.client.stream(
+            method, url, headers=headers, params=params, content=data, **kwargs))
+
+
+class MemoryResponse:
+    __slots__ = ('status', 'headers', 'body', 'request_info', 'history')
+
+    def __init__(self, status, headers, body, request_info):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.request_info = request_info
+        self.history = ()
+
+    async def read(self):
+        return self.body
+
+    async def iter_chunked(self, size):
+        for offset in range(0, len(self.body), size):
+            yield self.body[offset:offset + size]
+
+
+class _MemoryRequest:
+    __slots__ = ('transport', 'request')
+
+    def __init__(self, transport, request):
+        self.transport = transport
+        self.request = request
+
+    async def __aenter__(self):
+        status, headers, body = await self.transport.handler(self.request)
+        if body is not None and not isinstance(body, (bytes, bytearray)):
+            body = json.dumps(body).encode('utf-8')
+        request = self.request
+        return MemoryResponse(status, headers or {}, body or b'',
+                              request_info(request['method'], request['url'], request['headers']))
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+class MemoryTransport(Transport):
+    '''In-process transport for tests: no sockets, no event loop hops.
+    handler(request) is a coroutine function of a dict with method, url,
+    headers, params and data, returning (status, headers, body); a body that
+    is not bytes is sent as JSON. Requests are recorded in `requests`.
+    '''
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests = []
+        self.closed = False
+
+    def request(self, method, url, headers=None, params=None, data=None, trace=None, **kwargs):
+        request = {'method': method.upper(), 'url': url, 'headers': headers or {},
+                   'params': params or {}, 'data': data}
+        self.requests.append(request)
+        return _MemoryRequest(self, request)
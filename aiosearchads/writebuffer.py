@@ -0,0 +1,111 @@
+'''Write-behind batching of keyword updates
+'''
+import asyncio
+from .bulk import run_bulk
+from .errors import SearchAdsError
+
+
+class _Batch:
+    def __init__(self):
+        self.items = []
+        self.futures = []
+        self.index = {}
+        self.timer = None
+
+
+class WriteBuffer:
+    '''Collects single keyword updates per (campaign, ad group) and sends
+    each group as one bulk PUT once it holds max_size items or its oldest
+    item has waited max_delay seconds.
+    Each update returns a future resolved with that item's own result, or
+    failed with SearchAdsError when the API rejected it. Updates of the same
+    keyword id in one batch are merged, the later fields winning.
+    '''
+
+    def __init__(self, client, max_size=1000, max_delay=0.5, concurrency=4):
+        self.client = client
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self._batches = {}
+        self._tasks = set()
+        self._semaphore = None
+        self.concurrency = concurrency
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.flush()
+
+    def update_targeting_keyword(self, campaign_id, adgroup_id, keyword):
+        '''Queue one update_targeting_keywords item; returns a future.
+        '''
+        return self._add('update_targeting_keywords', campaign_id, adgroup_id, keyword)
+
+    def update_adgroup_negative_keyword(self, campaign_id, adgroup_id, keyword):
+        '''Queue one update_adgroup_negative_keywords item; returns a future.
+        '''
+        return self._add('update_adgroup_negative_keywords', campaign_id, adgroup_id, keyword)
+
+    def _add(self, method, campaign_id, adgroup_id, item):
+        key = (method, campaign_id, adgroup_id)
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = self._batches[key] = _Batch()
+            batch.timer = asyncio.get_event_loop().call_later(
+                self.max_delay, self._flush_batch, key)
+        future = asyncio.get_event_loop().create_future()
+        position = batch.index.get(item.get('id'))
+        if position is None:
+            if item.get('id') is not None:
+                batch.index[item['id']] = len(batch.items)
+            batch.items.append(item)
+            batch.futures.append([future])
+        else:
+            batch.items[position] = {**batch.items[position], **item}
+            batch.futures[position].append(future)
+        if len(batch.items) >= self.max_size:
+            self._flush_batch(key)
+        return future
+
+    def _flush_batch(self, key):
+        batch = self._batches.pop(key, None)
+        if batch is None:
+            return
+        batch.timer.cancel()
+        task = asyncio.ensure_future(self._send(key, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, key, batch):
+        method, campaign_id, adgroup_id = key
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def send(items):
+            return await getattr(self.client, method)(campaign_id, adgroup_id, items)
+        try:
+            async with self._semaphore:
+                result = await run_bulk(send, batch.items, self.max_size, 1)
+        except Exception as e:
+            for futures in batch.futures:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        for data, error, futures in zip(result.data, result.errors, batch.futures):
+            for future in futures:
+                if future.done():
+                    continue
+                if error is None:
+                    future.set_result(data)
+                else:
+                    future.set_exception(SearchAdsError(error))
+
+    async def flush(self):
+        '''Send every pending batch now and wait for all sends to finish.
+        '''
+        for key in list(self._batches):
+            self._flush_batch(key)
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks))
@@ -0,0 +1,69 @@
+'''Compare the installed JSON codecs on keyword report pages.
+
+    python -m benchmarks.codec [rows] [rounds]
+'''
+import sys
+import time
+import random
+from aiosearchads.codec import available_codecs, get_codec
+
+
+def money(amount):
+    return {'amount': '%.2f' % amount, 'currency': 'USD'}
+
+
+def report_page(rows, days=7):
+    '''A keyword-level report page shaped like reports/campaigns/{id}/keywords.
+    '''
+    row = []
+    for i in range(rows):
+        granularity = []
+        for day in range(days):
+            impressions = random.randint(0, 5000)
+            taps = random.randint(0, impressions // 10 + 1)
+            installs = random.randint(0, taps)
+            spend = taps * random.uniform(0.1, 3)
+            granularity.append({
+                'date': '2020-04-%02d' % (day + 1), 'impressions': impressions,
+                'taps': taps, 'installs': installs, 'newDownloads': installs,
+                'redownloads': 0, 'latOnInstalls': 0, 'latOffInstalls': installs,
+                'ttr': round(taps / impressions, 4) if impressions else 0,
+                'conversionRate': round(installs / taps, 4) if taps else 0,
+                'avgCPA': money(spend / installs if installs else 0),
+                'avgCPT': money(spend / taps if taps else 0),
+                'avgCPM': money(spend * 1000 / impressions if impressions else 0),
+                'localSpend': money(spend)})
+        row.append({
+            'other': False,
+            'granularity': granularity,
+            'metadata': {
+                'keywordId': 500000000 + i, 'keyword': 'keyword %d' % i,
+                'keywordStatus': 'ACTIVE', 'keywordDisplayStatus': 'RUNNING',
+                'matchType': 'EXACT', 'adGroupId': 400000 + i % 50,
+                'adGroupName': 'ad group %d' % (i % 50), 'adGroupDeleted': False,
+                'bidAmount': money(1.5), 'deleted': False,
+                'modificationTime': '2020-04-08T21:03:58.834'}})
+    return {'data': {'reportingDataResponse': {'row': row}},
+            'pagination': {'totalResults': rows, 'startIndex': 0, 'itemsPerPage': rows},
+            'error': None}
+
+
+def main(rows=1000, rounds=20):
+    page = report_page(rows)
+    raw = get_codec('json').dumps(page)
+    print('payload: %d rows, %.1f MB' % (rows, len(raw) / 1e6))
+    for name in available_codecs():
+        codec = get_codec(name)
+        started = time.perf_counter()
+        for _ in range(rounds):
+            codec.loads(raw)
+        decode = (time.perf_counter() - started) / rounds
+        started = time.perf_counter()
+        for _ in range(rounds):
+            codec.dumps(page)
+        encode = (time.perf_counter() - started) / rounds
+        print('%-8s decode %7.2f ms  encode %7.2f ms' % (name, decode * 1e3, encode * 1e3))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,142 @@
+'''Throughput and latency of the client against the local mock api.
+
+    python -m benchmarks.suite [--latency 0.02] [--throttle-rate 0.05] [--error-rate 0.01]
+                               [--transport aiohttp|httpx|httpx-h2]
+
+The mock runs in its own process so the numbers are the client's alone.
+Scenarios: keyword paging, bulk keyword writes and a large report pull.
+Reports requests/sec, p50/p99 request latency, peak RSS growth and CPU.
+'''
+import sys
+import time
+import asyncio
+import argparse
+import resource
+import subprocess
+from aiosearchads import AioSearchAds, RateLimiter, RetryPolicy, HttpxTransport
+
+
+class TimedClient(AioSearchAds):
+    '''AioSearchAds recording the duration of every round trip.
+    '''
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.durations = []
+
+    async def _fetch(self, method, url, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await super()._fetch(method, url, **kwargs)
+        finally:
+            self.durations.append(time.perf_counter() - started)
+
+
+def percentile(values, share):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def max_rss():
+    '''Peak resident set size of this process in MB.
+    '''
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1e6 if sys.platform == 'darwin' else rss / 1e3
+
+
+async def campaign_ids(core):
+    return [campaign['id'] async for campaign in core.iter_campaigns()]
+
+
+async def paging(core):
+    count = 0
+    for campaign_id in await campaign_ids(core):
+        async for _ in core.iter_find_targeting_keywords(campaign_id, limit=500, window=8):
+            count += 1
+    return count
+
+
+async def bulk_writes(core, size=20000):
+    campaign_id = (await campaign_ids(core))[0]
+    adgroup_id = (await core.all_adgroups(campaign_id, 0, 1))['data'][0]['id']
+    words = [{'text': 'bench %d' % i, 'matchType': 'EXACT',
+              'bidAmount': {'amount': '1', 'currency': 'USD'}} for i in range(size)]
+    result = await core.bulk_create_targeting_keywords(
+        campaign_id, adgroup_id, words, chunk_size=1000, concurrency=8)
+    return len(words) - len(result.failed)
+
+
+async def report_pull(core):
+    data = {'startTime': '2020-04-01', 'endTime': '2020-04-07', 'granularity': 'DAILY',
+            'returnRowTotals': True, 'selector': {'pagination': {'offset': 0, 'limit': 1000}}}
+    count = 0
+    for campaign_id in await campaign_ids(core):
+        async for _ in core.iter_keyword_level_reports(campaign_id, data):
+            count += 1
+    return count
+
+
+TRANSPORTS = {
+    'aiohttp': lambda: None,
+    'httpx': lambda: HttpxTransport(http2=False, max_connections=64, keepalive=64),
+    # h2 is negotiated over TLS only; against the plain-HTTP mock this falls back to HTTP/1.1
+    'httpx-h2': lambda: HttpxTransport(http2=True, max_connections=8, keepalive=8),
+}
+
+SCENARIOS = (('paging', paging), ('bulk writes', bulk_writes), ('report pull', report_pull))
+
+
+def start_mock(args):
+    command = [sys.executable, '-m', 'aiosearchads.mock', '--port', '0',
+               '--campaigns', str(args.campaigns), '--adgroups', str(args.adgroups),
+               '--keywords', str(args.keywords), '--latency', str(args.latency),
+               '--jitter', str(args.latency), '--error-rate', str(args.error_rate),
+               '--throttle-rate', str(args.throttle_rate), '--retry-after', '0.1']
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, universal_newlines=True)
+    url = process.stdout.readline().split()[-1]
+    return process, url
+
+
+async def main(args):
+    process, url = start_mock(args)
+    print('%-12s %8s %9s %9s %9s %9s %9s' % (
+        'scenario', 'items', 'req/s', 'p50 ms', 'p99 ms', '+rss MB', 'cpu s'))
+    try:
+        for name, scenario in SCENARIOS:
+            core = TimedClient(token='bench', org_id=1, api_url=url + '/api', codec=args.codec,
+                               token_url=url + '/auth/oauth2/token',
+                               limiter=RateLimiter(rate=1000, burst=100, max_in_flight=64),
+                               retry=RetryPolicy(backoff=0.05), transport=TRANSPORTS[args.transport]())
+            async with core:
+                rss = max_rss()
+                cpu, wall = time.process_time(), time.perf_counter()
+                items = await scenario(core)
+                wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            print('%-12s %8d %9.1f %9.2f %9.2f %9.1f %9.2f' % (
+                name, items, len(core.durations) / wall, percentile(core.durations, 0.5) * 1e3,
+                percentile(core.durations, 0.99) * 1e3, max_rss() - rss, cpu))
+        async with AioSearchAds(token='bench') as core:
+            stats = await core.request('get', url + '/mock/stats')
+        print('mock responses by status: %s' % stats['requests'])
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def parse(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--campaigns', type=int, default=3)
+    parser.add_argument('--adgroups', type=int, default=5)
+    parser.add_argument('--keywords', type=int, default=2000)
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--codec', default=None)
+    parser.add_argument('--transport', default='aiohttp', choices=sorted(TRANSPORTS))
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    asyncio.get_event_loop().run_until_complete(main(parse(sys.argv[1:])))
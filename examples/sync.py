@@ -0,0 +1,13 @@
+from aiosearchads import SyncSearchAds
+
+
+def campaigns():
+    # one background loop, session and token shared by every thread
+    core = SyncSearchAds(org_id='', token='')
+    with core:
+        data = core.all_campaigns(0, 100)
+        print(data)
+        ids = [campaign['id'] for campaign in core.iter_campaigns()]
+        print(core.map('get_campaign', ids, concurrency=10))
+
+campaigns()
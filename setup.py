@@ -37,7 +37,7 @@ setup(
     description='Asynchronous apple searchads framework for asyncio and Python',
     long_description=long_description,
     long_description_content_type="text/markdown",
-    packages=find_packages(),
+    packages=find_packages(exclude=('benchmarks', 'benchmarks.*')),
     classifiers=[
         'Programming Language :: Python :: 3.6',
         'Programming Language :: Python :: 3.7',
@@ -46,5 +46,15 @@ setup(
     zip_safe=False,
     include_package_data=True,
     platforms='any',
-    install_requires=requirements
+    install_requires=requirements,
+    extras_require={
+        'orjson': ['orjson'],
+        'ujson': ['ujson'],
+        'numpy': ['numpy'],
+        'pandas': ['pandas'],
+        'pyarrow': ['pyarrow'],
+        'prometheus': ['prometheus_client'],
+        'opentelemetry': ['opentelemetry-api'],
+        'http2': ['httpx[http2]'],
+    }
 )